@@ -9,14 +9,174 @@ Works alongside LuLu for enhanced protection
 
 import os
 import sys
+import atexit
 import json
+import re
 import time
+import socket
+import struct
 import subprocess
 import signal
+import selectors
 from pathlib import Path
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import Counter, defaultdict
 import threading
+from array import array
+
+# Prefer libpcap bindings (pypcap); fall back to parsing tcpdump text output
+try:
+    import pcap
+    HAS_PCAP = True
+except ImportError:
+    HAS_PCAP = False
+
+# Link-layer header length by pcap datalink type
+LINK_HEADER_LEN = {
+    0: 4,     # DLT_NULL (BSD loopback)
+    1: 14,    # DLT_EN10MB (Ethernet)
+    12: 0,    # DLT_RAW
+    108: 4,   # DLT_LOOP (OpenBSD loopback)
+    113: 16,  # DLT_LINUX_SLL (Linux "any" device)
+    276: 20,  # DLT_LINUX_SLL2 (Linux "any" device, newer libpcap)
+}
+
+# macOS "any" device: a variable-length pktap header wraps each packet
+# (DLT_PKTAP, or DLT_USER2 on older systems)
+PKTAP_DATALINKS = frozenset({149, 258})
+
+IP_PROTOCOLS = {6: 'tcp', 17: 'udp'}
+
+# Fields shared by every exported LuLu allow rule
+LULU_ALLOW_FIELDS = {
+    'action': '1',  # ALLOW
+    'type': '3',
+    'scope': '0'
+}
+
+# tcpdump -n -q line: "HH:MM:SS.micros [iface dir] IP src > dst: proto ..."
+# Like the JIT scanner, only the first " > " and what follows it matter
+TCPDUMP_LINE_RE = re.compile(rb' > (\S+?):?(?: (\S+)|$)')
+
+# orjson serializes in Rust; stdlib json is the fallback
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Optional JIT for the tcpdump text fallback
+try:
+    import numpy as np
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _scan_tcpdump_line(buf):
+    """
+    Locate the destination IP, port and protocol in a tcpdump -q line
+    Returns byte offsets (ip_start, ip_end, port_start, port_end,
+    proto_start, proto_end); ip_start is -1 when the line doesn't match
+    """
+    n = len(buf)
+    
+    # Find " > " separating source and destination
+    arrow = -1
+    for i in range(1, n - 1):
+        if buf[i] == 62 and buf[i - 1] == 32 and buf[i + 1] == 32:
+            arrow = i
+            break
+    if arrow == -1:
+        return -1, -1, -1, -1, -1, -1
+    
+    dst_start = arrow + 2
+    dst_end = dst_start
+    while dst_end < n and buf[dst_end] != 32 and buf[dst_end] != 10:
+        dst_end += 1
+    token_end = dst_end
+    if dst_end > dst_start and buf[dst_end - 1] == 58:  # trailing ':'
+        dst_end -= 1
+    
+    dot = -1
+    for i in range(dst_end - 1, dst_start - 1, -1):
+        if buf[i] == 46:
+            dot = i
+            break
+    if dot == -1:
+        return -1, -1, -1, -1, -1, -1
+    
+    proto_start = token_end
+    while proto_start < n and buf[proto_start] == 32:
+        proto_start += 1
+    proto_end = proto_start
+    while proto_end < n and buf[proto_end] != 32 and buf[proto_end] != 10:
+        proto_end += 1
+    
+    return dst_start, dot, dot + 1, dst_end, proto_start, proto_end
+
+
+if HAS_NUMBA:
+    _scan_tcpdump_line = njit(cache=True, nogil=True)(_scan_tcpdump_line)
+    # Compile at import time rather than on the first captured packet
+    _scan_tcpdump_line(np.frombuffer(b'00:00:00.0 IP 10.0.0.1.1 > 10.0.0.2.2: tcp 0', dtype=np.uint8))
+
+
+class ConnectionTable:
+    """
+    Unique endpoints discovered for one app, stored column-wise
+    Ports and hit counts live in typed arrays; strings are interned
+    """
+    
+    __slots__ = ('index', 'endpoints', 'ports', 'protocols', 'timestamps', 'hits')
+    
+    def __init__(self):
+        self.index = {}            # "endpoint:port" -> row
+        self.endpoints = []
+        self.ports = array('H')
+        self.protocols = []
+        self.timestamps = []       # first seen
+        self.hits = array('L')
+    
+    def __len__(self):
+        return len(self.endpoints)
+    
+    def add(self, conn):
+        """Add a connection record, counting repeats; True if the endpoint is new"""
+        key = sys.intern(f"{conn['endpoint']}:{conn['port']}")
+        hits = conn.get('hits', 1)
+        
+        row = self.index.get(key)
+        if row is not None:
+            self.hits[row] += hits
+            return False
+        
+        self.index[key] = len(self.endpoints)
+        self.endpoints.append(sys.intern(conn['endpoint']))
+        self.ports.append(int(conn['port']))
+        self.protocols.append(sys.intern(conn['protocol']))
+        self.timestamps.append(conn['timestamp'])
+        self.hits.append(hits)
+        return True
+    
+    def row(self, i):
+        """Materialize one row as a connection dict"""
+        return {
+            'endpoint': self.endpoints[i],
+            'port': str(self.ports[i]),
+            'protocol': self.protocols[i],
+            'timestamp': self.timestamps[i],
+            'hits': self.hits[i]
+        }
+    
+    def items(self):
+        """(key, connection dict) pairs in discovery order"""
+        return ((key, self.row(i)) for key, i in self.index.items())
+    
+    def to_list(self):
+        """Connection dicts for JSON persistence"""
+        return [self.row(i) for i in range(len(self))]
 
 class AdaptiveFirewallDaemon:
     def __init__(self, config_dir=None):
@@ -29,43 +189,108 @@ class AdaptiveFirewallDaemon:
         self.rules_file = self.config_dir / "rules.json"
         self.learning_file = self.config_dir / "learning_data.json"
         self.log_file = self.config_dir / "firewall.log"
+        # Append-only record of every captured connection since the last snapshot
+        self.journal_file = self.config_dir / "learning.ndjson"
+        
+        # One buffered handle for the daemon's lifetime instead of open/close per line
+        self._log_fp = open(self.log_file, 'a', buffering=1 << 16)
+        atexit.register(self._log_fp.close)
         
         self.learning_mode = False
         self.monitored_apps = set()
-        self.discovered_connections = defaultdict(list)
+        # {app: ConnectionTable} - deduplicated as packets arrive
+        self.discovered_connections = defaultdict(ConnectionTable)
         self.temp_allows = {}
         
+        # (epoch second, ISO string) - reused for every event in that second
+        self._ts_cache = (0, '')
+        
         self.load_config()
+        
+        # Unbuffered so each record is a single write() syscall
+        self._journal = open(self.journal_file, 'ab', buffering=0)
+        atexit.register(self._journal.close)
     
     def load_config(self):
         """Load existing configuration"""
         if self.rules_file.exists():
-            with open(self.rules_file) as f:
-                self.rules = json.load(f)
+            self.rules = self._read_json(self.rules_file)
         else:
             self.rules = {}
         
         if self.learning_file.exists():
-            with open(self.learning_file) as f:
-                self.discovered_connections = defaultdict(list, json.load(f))
+            learning_data = self._read_json(self.learning_file)
+            
+            # Stored as {app: [conn, ...]}; older files may repeat endpoints
+            for app_name, connections in learning_data.items():
+                for conn in connections:
+                    self._merge_connection(app_name, conn)
+        
+        # Replay connections captured after the last snapshot
+        if self.journal_file.exists():
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = self._loads(line)
+                    except ValueError:
+                        continue  # Torn final line from an interrupted write
+                    self._merge_connection(record.pop('app'), record)
     
     def save_config(self):
-        """Save configuration"""
-        with open(self.rules_file, 'w') as f:
-            json.dump(self.rules, f, indent=2)
+        """Save configuration and snapshot the learning journal"""
+        self._write_json(self.rules_file, self.rules)
+        self._write_json(
+            self.learning_file,
+            {app: table.to_list() for app, table in self.discovered_connections.items()}
+        )
         
-        with open(self.learning_file, 'w') as f:
-            json.dump(dict(self.discovered_connections), f, indent=2)
+        # Everything in the journal is now in the snapshot
+        self._journal.truncate(0)
+    
+    def _loads(self, data):
+        """Decode JSON bytes, using orjson when available"""
+        if HAS_ORJSON:
+            return orjson.loads(data)
+        return json.loads(data)
+    
+    def _dumps(self, data):
+        """Encode compact JSON bytes, using orjson when available"""
+        if HAS_ORJSON:
+            return orjson.dumps(data)
+        return json.dumps(data, separators=(',', ':')).encode()
     
-    def log(self, message):
-        """Log message"""
-        timestamp = datetime.now().isoformat()
+    def _read_json(self, path):
+        """Load a JSON file, using orjson when available"""
+        return self._loads(path.read_bytes())
+    
+    def _write_json(self, path, data):
+        """Write a JSON file in one call, using orjson when available"""
+        if HAS_ORJSON:
+            path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            path.write_text(json.dumps(data, indent=2))
+    
+    def _now_iso(self):
+        """Current time as ISO-8601, formatted at most once per second"""
+        now = int(time.time())
+        cached_second, cached_iso = self._ts_cache
+        if cached_second == now:
+            return cached_iso
+        
+        iso = datetime.fromtimestamp(now).isoformat()
+        self._ts_cache = (now, iso)
+        return iso
+    
+    def log(self, message, flush=False):
+        """Log message (buffered; pass flush=True for errors and milestones)"""
+        timestamp = self._now_iso()
         log_entry = f"[{timestamp}] {message}\n"
         
         print(log_entry.strip())
         
-        with open(self.log_file, 'a') as f:
-            f.write(log_entry)
+        self._log_fp.write(log_entry)
+        if flush:
+            self._log_fp.flush()
     
     def start_learning_mode(self, app_name, duration_seconds=300):
         """
@@ -88,9 +313,126 @@ class AdaptiveFirewallDaemon:
         return monitor_thread
     
     def _monitor_connections(self, app_name, duration):
-        """Monitor connections using tcpdump"""
+        """Monitor connections using libpcap, or tcpdump when pypcap is missing"""
         self.log(f"🔍 Monitoring {app_name} connections...")
         
+        try:
+            if HAS_PCAP:
+                self._capture_with_pcap(app_name, duration)
+            else:
+                self._capture_with_tcpdump(app_name, duration)
+            
+        except Exception as e:
+            self.log(f"❌ Error monitoring: {e}", flush=True)
+        
+        finally:
+            self.learning_mode = False
+            self.monitored_apps.discard(app_name)
+            self.save_config()
+            self.log(f"✅ Learning complete for {app_name}", flush=True)
+            self._generate_rules_for_app(app_name)
+    
+    def _capture_with_pcap(self, app_name, duration):
+        """Capture packets with libpcap and decode IP/TCP/UDP headers directly"""
+        # BPF filter runs in the kernel, so only TCP/UDP packets reach Python
+        sniffer = pcap.pcap(name='any', immediate=True, timeout_ms=500)
+        
+        try:
+            datalink = sniffer.datalink()
+            
+            if datalink in PKTAP_DATALINKS:
+                def on_packet(ts, buf):
+                    offset = self._pktap_offset(buf)
+                    conn_info = self._parse_packet(buf, offset) if offset is not None else None
+                    if conn_info:
+                        self._record_connection(app_name, conn_info)
+            elif datalink in LINK_HEADER_LEN:
+                offset = LINK_HEADER_LEN[datalink]
+                
+                def on_packet(ts, buf):
+                    conn_info = self._parse_packet(buf, offset)
+                    if conn_info:
+                        self._record_connection(app_name, conn_info)
+            else:
+                on_packet = None
+            
+            if on_packet:
+                sniffer.setfilter('tcp or udp')
+                deadline = time.monotonic() + duration
+                
+                # dispatch() hands over every buffered packet per call and returns
+                # on timeout, so the duration is checked even when traffic is idle
+                while time.monotonic() < deadline:
+                    sniffer.dispatch(-1, on_packet)
+        finally:
+            sniffer.close()
+        
+        if not on_packet:
+            self.log(f"⚠️  Unsupported pcap datalink type {datalink}, using tcpdump instead")
+            self._capture_with_tcpdump(app_name, duration)
+    
+    def _pktap_offset(self, buf):
+        """Offset of the IP header in a pktap-wrapped packet, or None"""
+        # pktap header: host-order length of the header itself, then the
+        # datalink type of the wrapped packet
+        if len(buf) < 8:
+            return None
+        
+        header_len, inner_datalink = struct.unpack_from('=II', buf, 0)
+        link_len = LINK_HEADER_LEN.get(inner_datalink)
+        if link_len is None:
+            return None
+        
+        return header_len + link_len
+    
+    def _parse_packet(self, buf, offset):
+        """Decode destination address, port and protocol from a raw IPv4/IPv6 packet"""
+        if len(buf) <= offset:
+            return None
+        
+        version = buf[offset] >> 4
+        
+        if version == 4:
+            if len(buf) < offset + 24:
+                return None
+            
+            ver_ihl, _, _, _, _, _, proto, _, _, dst = struct.unpack_from(
+                '!BBHHHBBH4s4s', buf, offset
+            )
+            
+            if proto not in IP_PROTOCOLS:
+                return None
+            
+            ihl = (ver_ihl & 0x0F) * 4
+            if len(buf) < offset + ihl + 4:
+                return None
+            
+            _, dst_port = struct.unpack_from('!HH', buf, offset + ihl)
+            dst_ip = socket.inet_ntoa(dst)
+        
+        elif version == 6:
+            # Fixed 40-byte header; packets with extension headers are skipped
+            if len(buf) < offset + 44:
+                return None
+            
+            proto = buf[offset + 6]
+            if proto not in IP_PROTOCOLS:
+                return None
+            
+            dst_port, = struct.unpack_from('!H', buf, offset + 42)
+            dst_ip = socket.inet_ntop(socket.AF_INET6, buf[offset + 24:offset + 40])
+        
+        else:
+            return None
+        
+        return {
+            'dst_ip': dst_ip,
+            'dst_port': str(dst_port),
+            'protocol': IP_PROTOCOLS[proto]
+        }
+    
+    def _capture_with_tcpdump(self, app_name, duration):
+        """Capture connections by parsing tcpdump text output"""
         # Use tcpdump to capture connections
         # Filter by process name if possible
         cmd = [
@@ -102,71 +444,139 @@ class AdaptiveFirewallDaemon:
             'tcp or udp'
         ]
         
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+        
+        deadline = time.monotonic() + duration
+        stdout_fd = process.stdout.fileno()
+        pending = b''
+        
+        # Wait on the pipe with a timeout so a quiet capture still ends on time
+        selector = selectors.DefaultSelector()
+        selector.register(process.stdout, selectors.EVENT_READ)
+        
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            start_time = time.time()
-            
-            for line in process.stdout:
-                if time.time() - start_time > duration:
+            # Read raw blocks and split them ourselves: no per-line decode
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(timeout=remaining):
                     break
                 
-                # Parse connection
-                conn_info = self._parse_tcpdump_line(line)
-                if conn_info:
-                    self.discovered_connections[app_name].append({
-                        'endpoint': conn_info['dst_ip'],
-                        'port': conn_info['dst_port'],
-                        'protocol': conn_info['protocol'],
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    
-                    self.log(f"  📡 {conn_info['dst_ip']}:{conn_info['dst_port']}")
-            
+                chunk = os.read(stdout_fd, 65536)
+                if not chunk:
+                    break
+                
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                
+                for line in lines:
+                    # Parse connection
+                    conn_info = self._parse_tcpdump_line(line)
+                    if conn_info:
+                        self._record_connection(app_name, conn_info)
+        finally:
+            selector.close()
             process.terminate()
-            
-        except Exception as e:
-            self.log(f"❌ Error monitoring: {e}")
+    
+    def _record_connection(self, app_name, conn_info):
+        """Store a discovered connection for an app and journal it"""
+        conn = {
+            'endpoint': conn_info['dst_ip'],
+            'port': conn_info['dst_port'],
+            'protocol': conn_info['protocol'],
+            'timestamp': self._now_iso()
+        }
         
-        finally:
-            self.learning_mode = False
-            self.monitored_apps.discard(app_name)
-            self.save_config()
-            self.log(f"✅ Learning complete for {app_name}")
-            self._generate_rules_for_app(app_name)
+        self._journal.write(self._dumps(dict(conn, app=app_name)) + b'\n')
+        
+        if self._merge_connection(app_name, conn):
+            self.log(f"  📡 {conn['endpoint']}:{conn['port']}")
+    
+    def _merge_connection(self, app_name, conn):
+        """Add a connection to an app's endpoints, counting repeats; True if new"""
+        # Ports are stored as 16-bit integers; skip legacy or hand-edited
+        # records whose port doesn't fit rather than failing the whole load
+        port = str(conn.get('port', ''))
+        if not (port.isascii() and port.isdigit() and int(port) <= 65535):
+            self.log(f"⚠️  Skipping {app_name} connection with invalid port {port!r}")
+            return False
+        
+        return self.discovered_connections[app_name].add(conn)
     
     def _parse_tcpdump_line(self, line):
-        """Parse a tcpdump output line"""
-        # Example: "12:34:56.789 IP 192.168.1.100.54321 > 1.2.3.4.443: tcp"
-        try:
-            parts = line.split()
-            if len(parts) < 5:
-                return None
-            
-            # Find the arrow
-            arrow_idx = parts.index('>')
-            
-            src = parts[arrow_idx - 1]
-            dst = parts[arrow_idx + 1].rstrip(':')
-            protocol = parts[arrow_idx + 2] if len(parts) > arrow_idx + 2 else 'tcp'
-            
-            # Parse dst IP and port
-            dst_parts = dst.rsplit('.', 1)
-            if len(dst_parts) == 2:
-                return {
-                    'dst_ip': dst_parts[0],
-                    'dst_port': dst_parts[1],
-                    'protocol': protocol
-                }
-        except:
-            pass
-        
-        return None
+        """Parse a tcpdump output line (bytes)"""
+        # Example: b"12:34:56.789 IP 192.168.1.100.54321 > 1.2.3.4.443: tcp"
+        if HAS_NUMBA:
+            conn_info = self._parse_tcpdump_line_jit(line)
+        else:
+            conn_info = self._parse_tcpdump_line_re(line)
+        
+        # Shape differs from the usual -n -q output: split on whitespace instead
+        if conn_info is None and b' > ' in line:
+            conn_info = self._parse_tcpdump_line_split(line)
+        
+        return conn_info
+    
+    def _parse_tcpdump_line_re(self, line):
+        """Parse a tcpdump output line (bytes) with the precompiled pattern"""
+        match = TCPDUMP_LINE_RE.search(line)
+        if not match:
+            return None
+        
+        dst, protocol = match.groups()
+        
+        # Parse dst IP and port
+        dst_ip, _, dst_port = dst.rpartition(b'.')
+        if not dst_ip:
+            return None
+        
+        return {
+            'dst_ip': dst_ip.decode(),
+            'dst_port': dst_port.decode(),
+            'protocol': protocol.decode() if protocol else 'tcp'
+        }
+    
+    def _parse_tcpdump_line_split(self, line):
+        """Parse a tcpdump output line (bytes) token by token"""
+        parts = line.split()
+        if b'>' not in parts:
+            return None
+        
+        arrow_idx = parts.index(b'>')
+        if arrow_idx + 1 >= len(parts):
+            return None
+        
+        dst = parts[arrow_idx + 1].rstrip(b':')
+        protocol = parts[arrow_idx + 2] if len(parts) > arrow_idx + 2 else b'tcp'
+        
+        # Parse dst IP and port
+        dst_ip, _, dst_port = dst.rpartition(b'.')
+        if not dst_ip:
+            return None
+        
+        return {
+            'dst_ip': dst_ip.decode(),
+            'dst_port': dst_port.decode(),
+            'protocol': protocol.decode()
+        }
+    
+    def _parse_tcpdump_line_jit(self, line):
+        """Parse a tcpdump output line (bytes) with the Numba-compiled scanner"""
+        ip_start, ip_end, port_start, port_end, proto_start, proto_end = \
+            _scan_tcpdump_line(np.frombuffer(line, dtype=np.uint8))
+        
+        if ip_start == -1:
+            return None
+        
+        return {
+            'dst_ip': line[ip_start:ip_end].decode(),
+            'dst_port': line[port_start:port_end].decode(),
+            'protocol': line[proto_start:proto_end].decode() or 'tcp'
+        }
     
     def _generate_rules_for_app(self, app_name):
         """Generate firewall rules from discovered connections"""
@@ -176,17 +586,11 @@ class AdaptiveFirewallDaemon:
             self.log(f"⚠️  No connections discovered for {app_name}")
             return
         
-        # Deduplicate and sort
-        unique_endpoints = {}
-        for conn in connections:
-            key = f"{conn['endpoint']}:{conn['port']}"
-            if key not in unique_endpoints:
-                unique_endpoints[key] = conn
-        
-        self.log(f"\n📊 Discovered {len(unique_endpoints)} unique endpoints for {app_name}:")
+        # Already deduplicated on insert; just sort
+        self.log(f"\n📊 Discovered {len(connections)} unique endpoints for {app_name}:")
         
         rules = []
-        for key, conn in sorted(unique_endpoints.items()):
+        for key, conn in sorted(connections.items()):
             self.log(f"  • {conn['endpoint']}:{conn['port']} ({conn['protocol']})")
             rules.append({
                 'endpointAddr': conn['endpoint'],
@@ -207,18 +611,12 @@ class AdaptiveFirewallDaemon:
         output_file = self.config_dir / f"lulu_rules_{app_name.lower()}.json"
         
         lulu_rules = {
-            f"com.{app_name.lower()}": []
+            f"com.{app_name.lower()}": [
+                {'endpointAddr': rule['endpointAddr'], 'endpointPort': rule['endpointPort']} | LULU_ALLOW_FIELDS
+                for rule in rules
+            ]
         }
         
-        for rule in rules:
-            lulu_rules[f"com.{app_name.lower()}"].append({
-                'endpointAddr': rule['endpointAddr'],
-                'endpointPort': rule['endpointPort'],
-                'action': '1',  # ALLOW
-                'type': '3',
-                'scope': '0'
-            })
-        
         with open(output_file, 'w') as f:
             json.dump(lulu_rules, f, separators=(',', ' : '))
         
@@ -277,15 +675,13 @@ class AdaptiveFirewallDaemon:
         print("=" * 60)
         
         for app_name, connections in self.discovered_connections.items():
-            print(f"\n{app_name} ({len(connections)} connections):")
+            total = sum(connections.hits)
+            print(f"\n{app_name} ({total} connections):")
             
-            # Group by endpoint
-            endpoints = defaultdict(int)
-            for conn in connections:
-                key = f"{conn['endpoint']}:{conn['port']}"
-                endpoints[key] += 1
+            # Keys are already unique per endpoint; most_common() does the sort
+            endpoints = Counter(dict(zip(connections.index, connections.hits)))
             
-            for endpoint, count in sorted(endpoints.items(), key=lambda x: x[1], reverse=True):
+            for endpoint, count in endpoints.most_common():
                 print(f"  • {endpoint} ({count}x)")
 
 def main():
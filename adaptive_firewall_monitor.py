@@ -7,19 +7,64 @@ Watches for blocked connections during app startup and temporarily allows them
 import os
 import sys
 import json
+import re
 import time
+import heapq
 import subprocess
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+# Hyperscan (optional) matches every startup indicator in one DFA pass
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
 class AdaptiveFirewallMonitor:
     def __init__(self, lulu_rules_path="/Library/Objective-See/LuLu/rules.plist"):
         self.lulu_rules_path = lulu_rules_path
         self.temp_allows = {}  # {endpoint: expiry_time}
+        
+        # Min-heap of (expiry_timestamp, key) drained by a single cleanup thread
+        self._expiry_heap = []
+        self._expiry_cond = threading.Condition()
+        self._expiry_thread = None
         self.discovered_endpoints = defaultdict(list)
         self.monitoring = False
         
+        # Compiled once; most LuLu log lines never mention a block
+        self._block_needle_re = re.compile(rb'BLOCK|(?i:blocked)')
+        self._block_message_re = re.compile(r'BLOCK|(?i:blocked)')
+        self._blocked_re = re.compile(r'BLOCK:\s+(\S+)\s*->\s*(\S+?):(\d+)')
+        # Pull eventMessage straight out of the raw JSON instead of decoding every event
+        self._event_message_re = re.compile(rb'"eventMessage"\s*:\s*"((?:[^"\\]|\\.)*)"')
+        
+        # Startup indicators grouped into one alternation, one scan per endpoint
+        startup_indicators = [
+            'api.',
+            'auth.',
+            'login.',
+            'oauth.',
+            'token.',
+            '.github.com',
+            '.vscode.dev',
+            'update.',
+            'telemetry.'
+        ]
+        self._startup_re = re.compile('|'.join(map(re.escape, startup_indicators)))
+        
+        self._startup_db = None
+        if HAS_HYPERSCAN:
+            self._startup_db = hyperscan.Database()
+            self._startup_db.compile(
+                expressions=[re.escape(ind).encode() for ind in startup_indicators],
+                ids=list(range(len(startup_indicators))),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(startup_indicators)
+            )
+        
     def monitor_lulu_logs(self):
         """Monitor LuLu's logs for blocked connections"""
         print("🔍 Starting adaptive firewall monitor...")
@@ -34,8 +79,7 @@ class AdaptiveFirewallMonitor:
         process = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            stderr=subprocess.PIPE
         )
         
         self.monitoring = True
@@ -53,17 +97,29 @@ class AdaptiveFirewallMonitor:
             process.terminate()
     
     def process_log_line(self, line):
-        """Process a log line from LuLu"""
+        """Process a raw (bytes) log line from LuLu"""
+        # Cheap byte scan first; only extract the message for candidate lines
+        if not self._block_needle_re.search(line):
+            return
+        
+        match = self._event_message_re.search(line)
+        if not match:
+            return
+        
+        raw_message = match.group(1)
+        
         try:
-            data = json.loads(line)
-            message = data.get('eventMessage', '')
-            
-            # Look for blocked connection patterns
-            if 'BLOCK' in message or 'blocked' in message.lower():
-                self.handle_blocked_connection(message, data)
-                
-        except json.JSONDecodeError:
-            pass
+            # Only messages containing escapes need a real JSON string decode
+            if b'\\' in raw_message:
+                message = json.loads(b'"' + raw_message + b'"')
+            else:
+                message = raw_message.decode()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return
+        
+        # Look for blocked connection patterns
+        if self._block_message_re.search(message):
+            self.handle_blocked_connection(message, line)
     
     def handle_blocked_connection(self, message, log_data):
         """Handle a blocked connection event"""
@@ -93,29 +149,27 @@ class AdaptiveFirewallMonitor:
         """Parse blocked connection details from log message"""
         # This needs to match LuLu's actual log format
         # Example: "BLOCK: Windsurf.app -> api.github.com:443"
+        match = self._blocked_re.search(message)
+        if not match:
+            return None
         
-        # TODO: Implement actual parsing based on LuLu log format
-        return None
+        return {
+            'app': match.group(1),
+            'endpoint': match.group(2),
+            'port': match.group(3)
+        }
     
     def is_startup_pattern(self, app_name, endpoint):
         """Detect if this looks like a startup connection"""
-        startup_indicators = [
-            'api.',
-            'auth.',
-            'login.',
-            'oauth.',
-            'token.',
-            '.github.com',
-            '.vscode.dev',
-            'update.',
-            'telemetry.'
-        ]
-        
-        for indicator in startup_indicators:
-            if indicator in endpoint.lower():
-                return True
+        if self._startup_db is not None:
+            matches = []
+            self._startup_db.scan(
+                endpoint.encode(),
+                match_event_handler=lambda id, start, end, flags, ctx: matches.append(id)
+            )
+            return bool(matches)
         
-        return False
+        return self._startup_re.search(endpoint.lower()) is not None
     
     def temporarily_allow(self, app_name, endpoint, port, duration_seconds=300):
         """Temporarily allow a connection (5 minutes default)"""
@@ -127,10 +181,31 @@ class AdaptiveFirewallMonitor:
         # Track expiry
         expiry = datetime.now() + timedelta(seconds=duration_seconds)
         key = f"{app_name}:{endpoint}:{port}"
-        self.temp_allows[key] = expiry
         
-        # Schedule cleanup
-        # TODO: Implement background thread to remove expired rules
+        with self._expiry_cond:
+            self.temp_allows[key] = expiry
+            heapq.heappush(self._expiry_heap, (expiry.timestamp(), key))
+            
+            # Schedule cleanup
+            if self._expiry_thread is None:
+                self._expiry_thread = threading.Thread(target=self._expiry_worker, daemon=True)
+                self._expiry_thread.start()
+            self._expiry_cond.notify()
+    
+    def _expiry_worker(self):
+        """Sleep until the next temporary rule expires, then remove it"""
+        with self._expiry_cond:
+            while True:
+                if not self._expiry_heap:
+                    self._expiry_cond.wait()
+                    continue
+                
+                remaining = self._expiry_heap[0][0] - time.time()
+                if remaining > 0:
+                    self._expiry_cond.wait(timeout=remaining)
+                    continue
+                
+                self.cleanup_expired_rules()
     
     def add_lulu_rule(self, app_name, endpoint, port, temporary=False):
         """Add a rule to LuLu"""
@@ -147,17 +222,20 @@ class AdaptiveFirewallMonitor:
     
     def cleanup_expired_rules(self):
         """Remove expired temporary rules"""
-        now = datetime.now()
-        expired = []
-        
-        for key, expiry in self.temp_allows.items():
-            if now > expiry:
-                expired.append(key)
+        now = time.time()
         
-        for key in expired:
-            print(f"🧹 Removing expired rule: {key}")
-            # TODO: Remove from LuLu
-            del self.temp_allows[key]
+        with self._expiry_cond:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expiry_ts, key = heapq.heappop(self._expiry_heap)
+                
+                # Skip stale entries left behind when a rule was re-allowed
+                expiry = self.temp_allows.get(key)
+                if expiry is None or expiry.timestamp() != expiry_ts:
+                    continue
+                
+                print(f"🧹 Removing expired rule: {key}")
+                # TODO: Remove from LuLu
+                del self.temp_allows[key]
     
     def save_discovered_endpoints(self, output_path="discovered_startup_endpoints.json"):
         """Save discovered endpoints for future rule generation"""
@@ -5,46 +5,86 @@ Identifies helper processes, language servers, and other supporting binaries
 """
 
 import json
+import mmap
+import os
 import re
 from pathlib import Path
 from collections import defaultdict
 
+# Generic helper-process name fragments, matched in one scan
+HELPER_KEYWORDS_RE = re.compile('|'.join(map(re.escape, ['helper', 'server', 'daemon', 'agent'])))
+
 def parse_netstat_file(netstat_path):
     """Parse netstat output to find process connections"""
     connections = defaultdict(set)
     
     try:
-        with open(netstat_path, 'r') as f:
-            for line in f:
-                # Look for lines with process names and connections
-                # Format: tcp4  0  0  192.168.0.145.53535  35.223.238.178.443  ESTABLISHED  55526  Windsurf
-                if 'ESTABLISHED' in line or 'LISTEN' in line:
-                    parts = line.split()
+        with open(netstat_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return connections
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Let mmap.find (memmem) jump between candidate lines instead
+                # of iterating every line of the dump in Python
+                pos = 0
+                next_est = mm.find(b'ESTABLISHED')
+                next_listen = mm.find(b'LISTEN')
+                
+                while next_est != -1 or next_listen != -1:
+                    if next_listen == -1 or (next_est != -1 and next_est < next_listen):
+                        hit = next_est
+                    else:
+                        hit = next_listen
+                    
+                    line_start = mm.rfind(b'\n', 0, hit) + 1
+                    line_end = mm.find(b'\n', hit)
+                    if line_end == -1:
+                        line_end = len(mm)
+                    
+                    # Format: tcp4  0  0  192.168.0.145.53535  35.223.238.178.443  ESTABLISHED  55526  Windsurf
+                    parts = mm[line_start:line_end].decode('utf-8', 'replace').split()
                     if len(parts) >= 8:
                         process_name = parts[-1]
-                        remote_addr = parts[4] if len(parts) > 4 else ""
+                        remote_addr = parts[4]
                         
                         # Extract destination
                         if ':' in remote_addr or '.' in remote_addr:
                             connections[process_name].add(remote_addr)
+                    
+                    pos = line_end + 1
+                    if next_est != -1 and next_est < pos:
+                        next_est = mm.find(b'ESTABLISHED', pos)
+                    if next_listen != -1 and next_listen < pos:
+                        next_listen = mm.find(b'LISTEN', pos)
     except Exception as e:
         print(f"Error parsing netstat: {e}")
     
     return connections
 
-def find_app_related_processes(app_name, connections):
+def index_processes(connections):
+    """Lowercase every process name once and flag generic helper processes"""
+    index = {}
+    
+    for process in connections:
+        process_lower = process.lower()
+        index[process] = (process_lower, HELPER_KEYWORDS_RE.search(process_lower) is not None)
+    
+    return index
+
+def find_app_related_processes(app_name, connections, process_index=None):
     """Find all processes related to an app"""
     related = {}
     app_lower = app_name.lower()
     
-    for process, dests in connections.items():
-        process_lower = process.lower()
-        
-        # Check if process is related to the app
-        if (app_lower in process_lower or 
+    if process_index is None:
+        process_index = index_processes(connections)
+    
+    for process, (process_lower, is_helper) in process_index.items():
+        # Check if process is related to the app (cheapest test first)
+        if (is_helper or
             process_lower.startswith(app_lower) or
-            any(keyword in process_lower for keyword in ['helper', 'server', 'daemon', 'agent'])):
-            related[process] = list(dests)
+            app_lower in process_lower):
+            related[process] = list(connections[process])
     
     return related
 
@@ -6,10 +6,194 @@ Discovers installed applications and maps them to required processes
 
 import os
 import plistlib
+import re
+import shelve
 import subprocess
-from pathlib import Path
+from collections import defaultdict
 from typing import Dict, List, Set, Tuple
 
+# lxml (optional) parses XML plists in C; plistlib is the fallback
+try:
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# numpy (optional) runs each substring test across all processes in one C loop
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# pyahocorasick (optional) matches every app needle against a process in one pass
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+INFO_PLIST_KEYS = ('CFBundleIdentifier', 'CFBundleExecutable')
+
+NETWORK_INDICATORS = (
+    'network', 'dns', 'http', 'tcp', 'udp', 'wifi', 'bluetooth',
+    'cloud', 'sync', 'account', 'connect', 'rapport', 'sharing',
+    'telemetry', 'analytics', 'reporting'
+)
+NETWORK_INDICATORS_RE = re.compile('|'.join(map(re.escape, NETWORK_INDICATORS)), re.IGNORECASE)
+
+# Helper process names an app commonly spawns; {name} is the app name, {lower} its lowercase
+HELPER_PROCESS_TEMPLATES = (
+    "{name} Helper",
+    "{name}Helper",
+    "com.{lower}.helper",
+    "{name} (GPU)",
+    "{name} (Renderer)"
+)
+
+# Parsed Info.plist values keyed by path, reused while (mtime, size) is unchanged
+PLIST_CACHE_PATH = os.path.expanduser("~/.cache/lulu_firewall/plist.db")
+
+
+class _InfoPlistKeysFound(Exception):
+    """Raised by the plist event handler once every wanted key is collected"""
+
+
+class _InfoPlistEventHandler:
+    """lxml parser target that collects top-level string values for INFO_PLIST_KEYS"""
+    
+    def __init__(self):
+        self.values = {}
+        self.depth = 0
+        self.current_key = None
+        self.text = []
+    
+    def start(self, tag, attrib):
+        if tag == 'dict':
+            self.depth += 1
+        self.text = []
+    
+    def data(self, data):
+        self.text.append(data)
+    
+    def end(self, tag):
+        if tag == 'dict':
+            self.depth -= 1
+        elif self.depth == 1 and tag == 'key':
+            self.current_key = ''.join(self.text)
+            return
+        elif self.depth == 1 and tag == 'string' and self.current_key in INFO_PLIST_KEYS:
+            self.values[self.current_key] = ''.join(self.text)
+            if len(self.values) == len(INFO_PLIST_KEYS):
+                raise _InfoPlistKeysFound()
+        
+        if self.depth == 1:
+            self.current_key = None
+    
+    def close(self):
+        return self.values
+
+
+def _parse_info_plist(path: str) -> Dict:
+    """Read the bundle identifier and executable from an Info.plist"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    # Binary plists (and missing lxml) go through plistlib
+    if not HAS_LXML or data.startswith(b'bplist00'):
+        return plistlib.loads(data)
+    
+    handler = _InfoPlistEventHandler()
+    parser = etree.XMLParser(target=handler, resolve_entities=False, no_network=True)
+    try:
+        return etree.fromstring(data, parser)
+    except _InfoPlistKeysFound:
+        return handler.values
+
+
+class AppInfo:
+    """
+    One installed app bundle
+    estimated_processes is only worked out on first access; most apps are
+    never selected. Supports app_info['key'] / app_info.get('key') for
+    callers written against the old dict form.
+    """
+    
+    __slots__ = ('name', 'path', 'bundle_id', 'executable', 'helper_apps', 'frameworks',
+                 '_estimated_processes', '_estimated_re')
+    
+    def __init__(self, name, path, bundle_id=None, executable=None, helper_apps=None, frameworks=None):
+        self.name = name
+        self.path = path
+        self.bundle_id = bundle_id
+        self.executable = executable
+        self.helper_apps = helper_apps if helper_apps is not None else []
+        self.frameworks = frameworks if frameworks is not None else []
+        self._estimated_processes = None
+        self._estimated_re = None
+    
+    @property
+    def estimated_processes(self) -> List[str]:
+        """Process names this app is likely to spawn"""
+        if self._estimated_processes is None:
+            self._estimated_processes = self._estimate_processes()
+        return self._estimated_processes
+    
+    @property
+    def estimated_re(self):
+        """Lowercase alternation of estimated_processes, for one search per process name"""
+        if self._estimated_re is None:
+            needles = dict.fromkeys(p.lower() for p in self.estimated_processes)
+            self._estimated_re = re.compile('|'.join(map(re.escape, needles)))
+        return self._estimated_re
+    
+    def _estimate_processes(self) -> List[str]:
+        """Estimate what processes an app might spawn"""
+        processes = []
+        app_name = self.name
+        
+        # Main executable
+        if self.executable:
+            processes.append(self.executable)
+        else:
+            processes.append(app_name)
+        
+        # Common helper patterns
+        app_name_lower = app_name.lower()
+        processes.extend(
+            template.format(name=app_name, lower=app_name_lower)
+            for template in HELPER_PROCESS_TEMPLATES
+        )
+        
+        # Framework-based processes
+        for framework in self.frameworks:
+            if 'Helper' in framework or 'Service' in framework:
+                processes.append(framework.replace('.framework', ''))
+        
+        return processes
+    
+    def to_dict(self) -> Dict:
+        """Plain dict form, as stored in app mappings and exported configs"""
+        return {
+            'name': self.name,
+            'path': self.path,
+            'bundle_id': self.bundle_id,
+            'executable': self.executable,
+            'helper_apps': self.helper_apps,
+            'frameworks': self.frameworks,
+            'estimated_processes': self.estimated_processes
+        }
+    
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
 class AppAnalyzer:
     def __init__(self):
         self.installed_apps = {}
@@ -22,100 +206,113 @@ class AppAnalyzer:
             'trustd': {'path': '/usr/libexec/trustd', 'reason': 'Certificate validation'},
             'nsurlsessiond': {'path': '/usr/libexec/nsurlsessiond', 'reason': 'System HTTP requests'}
         }
+        self._plist_cache = None
         
     def discover_installed_apps(self) -> Dict:
         """Discover all installed applications"""
         print("🔍 Discovering installed applications...")
         
         apps = {}
-        applications_dir = Path("/Applications")
+        applications_dir = "/Applications"
         
-        if not applications_dir.exists():
+        if not os.path.isdir(applications_dir):
             print("❌ /Applications directory not found")
             return apps
-            
-        for app_path in applications_dir.glob("*.app"):
-            try:
-                app_info = self._analyze_app_bundle(app_path)
-                if app_info:
-                    apps[app_info['name']] = app_info
-            except Exception as e:
-                print(f"⚠️ Error analyzing {app_path.name}: {e}")
+        
+        self._plist_cache = self._open_plist_cache()
+        
+        try:
+            # scandir yields cached DirEntry objects - no Path or extra stat() per child
+            with os.scandir(applications_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".app") or not entry.is_dir():
+                        continue
+                    
+                    try:
+                        app_info = self._analyze_app_bundle(entry.path)
+                        if app_info:
+                            apps[app_info.name] = app_info
+                    except Exception as e:
+                        print(f"⚠️ Error analyzing {entry.name}: {e}")
+        finally:
+            if self._plist_cache is not None:
+                self._plist_cache.close()
+                self._plist_cache = None
                 
         self.installed_apps = apps
         print(f"✅ Found {len(apps)} installed applications")
         return apps
     
-    def _analyze_app_bundle(self, app_path: Path) -> Dict:
+    def _analyze_app_bundle(self, app_path: str) -> AppInfo:
         """Analyze an app bundle to extract information"""
-        info_plist_path = app_path / "Contents" / "Info.plist"
-        
-        app_info = {
-            'name': app_path.stem,
-            'path': str(app_path),
-            'bundle_id': None,
-            'executable': None,
-            'helper_apps': [],
-            'frameworks': [],
-            'estimated_processes': []
-        }
+        app_path = os.fspath(app_path)
+        app_dir_name = os.path.basename(app_path)
+        contents_dir = os.path.join(app_path, "Contents")
+        info_plist_path = os.path.join(contents_dir, "Info.plist")
+        
+        app_info = AppInfo(os.path.splitext(app_dir_name)[0], app_path)
         
         # Read Info.plist if it exists
-        if info_plist_path.exists():
-            try:
-                with open(info_plist_path, 'rb') as f:
-                    plist_data = plistlib.load(f)
-                    
-                app_info['bundle_id'] = plist_data.get('CFBundleIdentifier')
-                app_info['executable'] = plist_data.get('CFBundleExecutable')
-                
-            except Exception as e:
-                print(f"⚠️ Could not read Info.plist for {app_path.name}: {e}")
+        try:
+            plist_data = self._read_info_plist(info_plist_path)
+            
+            app_info.bundle_id = plist_data.get('CFBundleIdentifier')
+            app_info.executable = plist_data.get('CFBundleExecutable')
+            
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Could not read Info.plist for {app_dir_name}: {e}")
         
         # Look for helper applications
-        helpers_dir = app_path / "Contents" / "Library" / "LaunchServices"
-        if helpers_dir.exists():
-            for helper_path in helpers_dir.glob("*.app"):
-                app_info['helper_apps'].append(str(helper_path))
+        helpers_dir = os.path.join(contents_dir, "Library", "LaunchServices")
+        app_info.helper_apps = self._scan_bundle_dir(helpers_dir, ".app", full_path=True)
         
         # Look for frameworks that might spawn processes
-        frameworks_dir = app_path / "Contents" / "Frameworks"
-        if frameworks_dir.exists():
-            for framework_path in frameworks_dir.glob("*.framework"):
-                app_info['frameworks'].append(framework_path.name)
-        
-        # Estimate likely process names
-        app_info['estimated_processes'] = self._estimate_app_processes(app_info)
+        frameworks_dir = os.path.join(contents_dir, "Frameworks")
+        app_info.frameworks = self._scan_bundle_dir(frameworks_dir, ".framework")
         
         return app_info
     
-    def _estimate_app_processes(self, app_info: Dict) -> List[str]:
-        """Estimate what processes an app might spawn"""
-        processes = []
-        app_name = app_info['name']
+    def _open_plist_cache(self):
+        """Open the on-disk Info.plist cache, or None if it can't be used"""
+        try:
+            os.makedirs(os.path.dirname(PLIST_CACHE_PATH), exist_ok=True)
+            return shelve.open(PLIST_CACHE_PATH)
+        except Exception as e:
+            print(f"⚠️ Info.plist cache unavailable: {e}")
+            return None
+    
+    def _read_info_plist(self, info_plist_path: str) -> Dict:
+        """Return the Info.plist keys we use, from the cache when the file is unchanged"""
+        st = os.stat(info_plist_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cache = self._plist_cache
         
-        # Main executable
-        if app_info['executable']:
-            processes.append(app_info['executable'])
-        else:
-            processes.append(app_name)
+        if cache is not None:
+            cached = cache.get(info_plist_path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
         
-        # Common helper patterns
-        helper_patterns = [
-            f"{app_name} Helper",
-            f"{app_name}Helper", 
-            f"com.{app_name.lower()}.helper",
-            f"{app_name} (GPU)",
-            f"{app_name} (Renderer)"
-        ]
-        processes.extend(helper_patterns)
+        plist_data = _parse_info_plist(info_plist_path)
+        values = {key: plist_data.get(key) for key in INFO_PLIST_KEYS}
         
-        # Framework-based processes
-        for framework in app_info['frameworks']:
-            if 'Helper' in framework or 'Service' in framework:
-                processes.append(framework.replace('.framework', ''))
+        if cache is not None:
+            cache[info_plist_path] = (stamp, values)
         
-        return processes
+        return values
+    
+    def _scan_bundle_dir(self, directory: str, suffix: str, full_path: bool = False) -> List[str]:
+        """List entries in a bundle subdirectory ending with suffix (names or full paths)"""
+        try:
+            with os.scandir(directory) as entries:
+                return [
+                    entry.path if full_path else entry.name
+                    for entry in entries
+                    if entry.name.endswith(suffix)
+                ]
+        except OSError:
+            return []
     
     def map_apps_to_detected_processes(self, detected_processes: Dict) -> Dict:
         """Map discovered apps to actually detected processes from diagnostics"""
@@ -123,21 +320,19 @@ class AppAnalyzer:
         
         app_process_mapping = {}
         
+        if HAS_AHOCORASICK and self.installed_apps:
+            matches_by_app = self._match_processes_with_automaton(detected_processes)
+        elif HAS_NUMPY and self.installed_apps:
+            matches_by_app = self._match_processes_with_arrays(detected_processes)
+        else:
+            matches_by_app = self._match_processes_with_prefix_index(detected_processes)
+        
         for app_name, app_info in self.installed_apps.items():
-            matched_processes = []
-            
-            # Check each detected process against this app
-            for process_key, process_info in detected_processes.items():
-                process_name = process_info.get('name', '')
-                process_path = process_info.get('path', '')
-                
-                # Direct name matches
-                if self._is_process_related_to_app(process_name, process_path, app_info):
-                    matched_processes.append(process_info)
+            matched_processes = matches_by_app.get(app_name)
             
             if matched_processes:
                 app_process_mapping[app_name] = {
-                    'app_info': app_info,
+                    'app_info': app_info.to_dict(),
                     'detected_processes': matched_processes,
                     'process_count': len(matched_processes)
                 }
@@ -145,10 +340,134 @@ class AppAnalyzer:
         print(f"✅ Mapped {len(app_process_mapping)} apps to detected processes")
         return app_process_mapping
     
-    def _is_process_related_to_app(self, process_name: str, process_path: str, app_info: Dict) -> bool:
+    def _build_process_automaton(self):
+        """
+        Build one Aho-Corasick automaton over every app's match needles
+        Payload: ((app_name, scope), ...) where scope says whether the
+        needle applies to the process 'name' or 'path'
+        """
+        owners = defaultdict(set)
+        
+        for app_name, app_info in self.installed_apps.items():
+            name_lower = app_info.name.lower()
+            owners[name_lower].update(((app_name, 'name'), (app_name, 'path')))
+            
+            if app_info.bundle_id:
+                owners[app_info.bundle_id.lower()].add((app_name, 'path'))
+            
+            for estimated_process in app_info.estimated_processes:
+                owners[estimated_process.lower()].add((app_name, 'name'))
+        
+        automaton = ahocorasick.Automaton()
+        for needle, needle_owners in owners.items():
+            if needle:
+                automaton.add_word(needle, tuple(needle_owners))
+        automaton.make_automaton()
+        
+        return automaton
+    
+    def _match_processes_with_automaton(self, detected_processes: Dict) -> Dict:
+        """Same matching as _is_process_related_to_app, one automaton scan per process"""
+        automaton = self._build_process_automaton()
+        matches_by_app = defaultdict(list)
+        
+        for process_info in detected_processes.values():
+            process_name = (process_info.get('name', '') or '').lower()
+            process_path = (process_info.get('path', '') or '').lower()
+            name_end = len(process_name)
+            
+            # Needles never contain NUL, so no match can span both fields
+            related_apps = set()
+            for end_index, needle_owners in automaton.iter(f"{process_name}\x00{process_path}"):
+                scope = 'name' if end_index < name_end else 'path'
+                for app_name, needle_scope in needle_owners:
+                    if needle_scope == scope:
+                        related_apps.add(app_name)
+            
+            for app_name in related_apps:
+                matches_by_app[app_name].append(process_info)
+        
+        return matches_by_app
+    
+    def _match_processes_with_arrays(self, detected_processes: Dict) -> Dict:
+        """
+        Same matching as _is_process_related_to_app, with processes held as
+        parallel name/path arrays so each needle is one np.char.find pass
+        """
+        processes = list(detected_processes.values())
+        names = np.array([(p.get('name', '') or '').lower() for p in processes], dtype=str)
+        paths = np.array([(p.get('path', '') or '').lower() for p in processes], dtype=str)
+        matches_by_app = {}
+        
+        for app_name, app_info in self.installed_apps.items():
+            name_lower = app_info.name.lower()
+            name_needles = dict.fromkeys([name_lower] + [p.lower() for p in app_info.estimated_processes])
+            path_needles = [name_lower]
+            if app_info.bundle_id:
+                path_needles.append(app_info.bundle_id.lower())
+            
+            hits = np.zeros(len(processes), dtype=bool)
+            for needle in name_needles:
+                hits |= np.char.find(names, needle) >= 0
+            for needle in path_needles:
+                hits |= np.char.find(paths, needle) >= 0
+            
+            if hits.any():
+                matches_by_app[app_name] = [processes[i] for i in np.flatnonzero(hits)]
+        
+        return matches_by_app
+    
+    def _build_prefix_index(self) -> Tuple[Dict[str, Set[str]], Set[str]]:
+        """
+        Bucket apps by the first two characters of each match needle
+        An app can only match a process whose name or path contains one of
+        its buckets; apps with needles shorter than two characters always
+        stay candidates
+        """
+        prefix_index = defaultdict(set)
+        always_check = set()
+        
+        for app_name, app_info in self.installed_apps.items():
+            needles = [app_info.name]
+            if app_info.bundle_id:
+                needles.append(app_info.bundle_id)
+            needles.extend(app_info.estimated_processes)
+            
+            for needle in needles:
+                needle = needle.lower()
+                if len(needle) >= 2:
+                    prefix_index[needle[:2]].add(app_name)
+                else:
+                    always_check.add(app_name)
+        
+        return prefix_index, always_check
+    
+    def _match_processes_with_prefix_index(self, detected_processes: Dict) -> Dict:
+        """_is_process_related_to_app, run only against apps whose needle prefixes occur in the process"""
+        prefix_index, always_check = self._build_prefix_index()
+        matches_by_app = defaultdict(list)
+        
+        for process_info in detected_processes.values():
+            process_name = process_info.get('name', '')
+            process_path = process_info.get('path', '')
+            text = f"{(process_name or '').lower()}\x00{(process_path or '').lower()}"
+            
+            candidates = set(always_check)
+            for bigram in {text[i:i + 2] for i in range(len(text) - 1)}:
+                bucket = prefix_index.get(bigram)
+                if bucket:
+                    candidates.update(bucket)
+            
+            for app_name in candidates:
+                if self._is_process_related_to_app(process_name, process_path, self.installed_apps[app_name]):
+                    matches_by_app[app_name].append(process_info)
+        
+        return matches_by_app
+    
+    def _is_process_related_to_app(self, process_name: str, process_path: str, app_info: AppInfo) -> bool:
         """Determine if a process is related to a specific app"""
-        app_name = app_info['name'].lower()
-        bundle_id = app_info.get('bundle_id', '').lower()
+        app_name = app_info.name.lower()
+        bundle_id = (app_info.bundle_id or '').lower()
         
         # Safely handle None values
         process_name = process_name.lower() if process_name else ''
@@ -167,11 +486,7 @@ class AppAnalyzer:
             return True
             
         # Check estimated processes
-        for estimated_process in app_info.get('estimated_processes', []):
-            if estimated_process.lower() in process_name:
-                return True
-        
-        return False
+        return app_info.estimated_re.search(process_name) is not None
     
     def get_app_requirements(self, selected_apps: List[str], detected_processes: Dict) -> Dict:
         """Get all process requirements for selected apps"""
@@ -187,6 +502,9 @@ class AppAnalyzer:
         # Map apps to processes
         app_mapping = self.map_apps_to_detected_processes(detected_processes)
         
+        # Same process dicts are shared between apps - dedupe by identity, not list scans
+        seen_processes = set()
+        
         # Collect requirements for selected apps
         for app_name in selected_apps:
             if app_name in app_mapping:
@@ -195,7 +513,8 @@ class AppAnalyzer:
                 
                 # Add all detected processes for this app to allowed list
                 for process in app_data['detected_processes']:
-                    if process not in requirements['allowed_processes']:
+                    if id(process) not in seen_processes:
+                        seen_processes.add(id(process))
                         requirements['allowed_processes'].append(process)
         
         # Identify processes to block (network processes not in allowed list)
@@ -221,16 +540,8 @@ class AppAnalyzer:
         """Check if a process is network-related"""
         name = process_info.get('name', '') or ''
         path = process_info.get('path', '') or ''
-        name = name.lower()
-        path = path.lower()
-        
-        network_indicators = [
-            'network', 'dns', 'http', 'tcp', 'udp', 'wifi', 'bluetooth',
-            'cloud', 'sync', 'account', 'connect', 'rapport', 'sharing',
-            'telemetry', 'analytics', 'reporting'
-        ]
         
-        return any(indicator in name or indicator in path for indicator in network_indicators)
+        return bool(NETWORK_INDICATORS_RE.search(name) or NETWORK_INDICATORS_RE.search(path))
     
     def print_app_summary(self):
         """Print summary of discovered applications"""
@@ -240,9 +551,9 @@ class AppAnalyzer:
         
         for app_name, app_info in self.installed_apps.items():
             print(f"\n• {app_name}")
-            if app_info.get('bundle_id'):
-                print(f"  Bundle ID: {app_info['bundle_id']}")
-            print(f"  Estimated processes: {len(app_info['estimated_processes'])}")
+            if app_info.bundle_id:
+                print(f"  Bundle ID: {app_info.bundle_id}")
+            print(f"  Estimated processes: {len(app_info.estimated_processes)}")
 
 
 # Test function
@@ -15,11 +15,209 @@ If no directory provided, finds latest sysdiag automatically.
 """
 
 import json
+import os
 import re
+import shelve
+import socket
+import struct
+from ipaddress import ip_network
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+# orjson (optional) writes the rules file in C
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# google-re2 (optional) scans in linear time with no backtracking
+try:
+    import re2
+    HAS_RE2 = True
+except ImportError:
+    HAS_RE2 = False
+
+# pyahocorasick (optional) finds every app name in a context in one pass
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+_scan_engine = re2 if HAS_RE2 else re
+
+URL_RE = _scan_engine.compile(r'https?://[a-zA-Z0-9./?=_%:-]+')
+
+# Domains are found from their TLD: locate ".com"/".net"/... first, then walk
+# back over domain characters, instead of retrying [a-z0-9.-]+ at every offset
+TLD_RE = re.compile(r'(?i)\.(?:com|net|org|io|dev|ai|co)\b')
+DOMAIN_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-')
+APP_PATH_RE = re.compile(r'/Applications/([^/]+)\.app')
+
+# netstat columns: app/process names and "address.port" tokens
+NETSTAT_APP_RE = re.compile(r'Helper|\.app|server|language')
+NETSTAT_ADDR_RE = re.compile(r'[a-z0-9.-]+\.\d+')
+
+# Per-log-file scan results, reused while the file and the app list are unchanged
+LOG_CACHE_PATH = os.path.expanduser("~/.cache/lulu_firewall/logs.db")
+
+# Private/loopback/link-local IPv4 ranges as (first, last) 32-bit integers
+PRIVATE_IPV4_RANGES = [
+    (int(net.network_address), int(net.broadcast_address))
+    for net in map(ip_network, ('10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16',
+                                '127.0.0.0/8', '169.254.0.0/16'))
+]
+
+def _is_private_ipv4(ip):
+    """True for private IPv4 addresses; hostnames and other strings are never private"""
+    try:
+        value = struct.unpack('!I', socket.inet_aton(ip))[0]
+    except OSError:
+        return False
+    return any(low <= value <= high for low, high in PRIVATE_IPV4_RANGES)
+
+def _is_word_boundary(text, i):
+    """True where a regex \\b would match at offset i"""
+    before = i > 0 and (text[i - 1].isalnum() or text[i - 1] == '_')
+    after = i < len(text) and (text[i].isalnum() or text[i] == '_')
+    return before != after
+
+def _iter_domain_spans(line):
+    """Yield (start, end) of each domain, as r'(?i)\\b[a-z0-9.-]+\\.(com|net|...)\\b' would match"""
+    anchors = [match.span() for match in TLD_RE.finditer(line)]
+    pos = 0
+    i = 0
+    
+    while i < len(anchors):
+        dot, end = anchors[i]
+        if dot < pos:
+            i += 1
+            continue
+        
+        # Walk back over domain characters; the leftmost word boundary starts the match
+        run_start = dot
+        while run_start > pos and line[run_start - 1] in DOMAIN_CHARS:
+            run_start -= 1
+        
+        start = next((s for s in range(run_start, dot) if _is_word_boundary(line, s)), None)
+        if start is None:
+            i += 1
+            continue
+        
+        # Greedy match: extend to the last TLD in the same run of domain characters
+        while i + 1 < len(anchors) and all(c in DOMAIN_CHARS for c in line[end:anchors[i + 1][0]]):
+            i += 1
+            end = anchors[i][1]
+        
+        yield start, end
+        pos = end
+        i += 1
+
+def _wildcard(domain):
+    """Collapse a subdomain to its parent wildcard: api.example.com -> *.example.com"""
+    last_dot = domain.rfind('.')
+    second_dot = domain.rfind('.', 0, last_dot)
+    return '*' + domain[second_dot:] if second_dot >= 0 else domain
+
+def _lines_with_lookahead(f, size):
+    """Yield (line, up to `size` characters of the text that follows it)"""
+    pending = deque()
+    buffered = 0
+    
+    for line in f:
+        pending.append(line)
+        buffered += len(line)
+        
+        # Release lines once enough following text is buffered behind them
+        while buffered - len(pending[0]) >= size:
+            line_out = pending.popleft()
+            buffered -= len(line_out)
+            yield line_out, ''.join(pending)[:size]
+    
+    while pending:
+        line_out = pending.popleft()
+        yield line_out, ''.join(pending)[:size]
+
+def _build_app_automaton(app_names_lower):
+    """Aho-Corasick automaton over lowercased app names -> (order, app_name)"""
+    automaton = ahocorasick.Automaton()
+    
+    for order, (name_lower, app_name) in enumerate(app_names_lower):
+        if name_lower and name_lower not in automaton:
+            automaton.add_word(name_lower, (order, app_name))
+    
+    if len(automaton) == 0:
+        return None
+    
+    automaton.make_automaton()
+    return automaton
+
+def _find_app_in_context(context_lower, app_names_lower, app_automaton):
+    """Return the first app (in discovery order) whose name appears in the context"""
+    if app_automaton is not None:
+        hits = [payload for _, payload in app_automaton.iter(context_lower)]
+        return min(hits)[1] if hits else None
+    
+    for name_lower, app_name in app_names_lower:
+        if name_lower in context_lower:
+            return app_name
+    
+    return None
+
+# Per-process state for log scanning workers, set up once by _init_log_worker
+_worker_app_names = []
+_worker_app_automaton = None
+
+def _init_log_worker(app_names_lower):
+    """Build the app-name matcher once per worker process"""
+    global _worker_app_names, _worker_app_automaton
+    _worker_app_names = app_names_lower
+    _worker_app_automaton = _build_app_automaton(app_names_lower) if HAS_AHOCORASICK else None
+
+def _scan_log_file(log_file):
+    """Scan one log file for domains and attribute them to apps: {app: set(domains)}"""
+    file_domains = defaultdict(set)
+    
+    try:
+        # Stream lines, buffering just enough text for 200 characters of context
+        tail = ''
+        
+        with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
+            for line, following in _lines_with_lookahead(f, 200):
+                # Find domain names
+                for start, end in _iter_domain_spans(line):
+                    domain = line[start:end].lower()
+                    
+                    # Find associated app (look for app name in context)
+                    before = (tail + line[:start])[-200:]
+                    after = (line[end:] + following)[:200]
+                    context = before + line[start:end] + after
+                    
+                    # Look for app names
+                    app_name = _find_app_in_context(
+                        context.lower(), _worker_app_names, _worker_app_automaton
+                    )
+                    if app_name:
+                        file_domains[app_name].add(domain)
+                
+                tail = (tail + line)[-200:]
+    except Exception:
+        pass
+    
+    return dict(file_domains)
+
+def _open_log_cache():
+    """Open the on-disk log scan cache, or None if it can't be used"""
+    try:
+        os.makedirs(os.path.dirname(LOG_CACHE_PATH), exist_ok=True)
+        return shelve.open(LOG_CACHE_PATH)
+    except Exception as e:
+        print(f"⚠️  Log scan cache unavailable: {e}")
+        return None
+
 class EndpointDiscovery:
     def __init__(self, sysdiag_dir=None):
         self.sysdiag_dir = Path(sysdiag_dir) if sysdiag_dir else self.find_latest_sysdiag()
@@ -60,24 +258,29 @@ class EndpointDiscovery:
         
         print("📋 Analyzing process command lines...")
         
-        with open(ps_file, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-        
-        # Find all URLs with context
-        url_pattern = r'https?://[a-zA-Z0-9./?=_%:-]+'
+        # One forward pass: remember .app paths seen in the last 1000 characters
+        offset = 0
+        recent_apps = deque()  # (start, end, app_name), stream offsets
         
-        for match in re.finditer(url_pattern, content):
-            url = match.group(0)
-            
-            # Find app name from context (look backwards for .app path)
-            start = max(0, match.start() - 1000)
-            context = content[start:match.start()]
-            
-            # Extract app name
-            app_match = re.search(r'/Applications/([^/]+)\.app', context)
-            if app_match:
-                app_name = app_match.group(1)
-                self.app_endpoints[app_name]["urls"].add(url)
+        with open(ps_file, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                for app_match in APP_PATH_RE.finditer(line):
+                    recent_apps.append((offset + app_match.start(), offset + app_match.end(), app_match.group(1)))
+                
+                # Find all URLs with context
+                for match in URL_RE.finditer(line):
+                    url = match.group(0)
+                    url_start = offset + match.start()
+                    
+                    # Earliest .app path within the 1000 characters before the URL
+                    while recent_apps and recent_apps[0][0] < url_start - 1000:
+                        recent_apps.popleft()
+                    
+                    if recent_apps and recent_apps[0][1] <= url_start:
+                        app_name = recent_apps[0][2]
+                        self.app_endpoints[app_name]["urls"].add(url)
+                
+                offset += len(line)
         
         print(f"   Found URLs for {len(self.app_endpoints)} apps")
     
@@ -104,7 +307,7 @@ class EndpointDiscovery:
                 # Find app name (usually at end)
                 app_name = None
                 for part in reversed(parts):
-                    if any(keyword in part for keyword in ['Helper', '.app', 'server', 'language']):
+                    if NETSTAT_APP_RE.search(part):
                         app_name = part.split(':')[0]  # Remove PID
                         break
                 
@@ -113,13 +316,13 @@ class EndpointDiscovery:
                 
                 # Find remote address
                 for part in parts:
-                    # Match IP:port or hostname:port
-                    if re.match(r'[\d.]+\.\d+', part) or re.match(r'[a-z0-9.-]+\.\d+', part):
+                    # Match IP.port or hostname.port
+                    if NETSTAT_ADDR_RE.match(part):
                         addr = part.split('.')[:-1]  # Remove port
                         if addr:
                             ip = '.'.join(addr)
                             # Skip private IPs
-                            if not ip.startswith(('192.168.', '10.', '172.', '127.')):
+                            if not _is_private_ipv4(ip):
                                 self.app_endpoints[app_name]["ips"].add(ip)
         
         print(f"   Found connections for {sum(1 for e in self.app_endpoints.values() if e['ips'])} apps")
@@ -134,33 +337,52 @@ class EndpointDiscovery:
         
         print("🔍 Analyzing DNS queries...")
         
-        # Search all log files
-        for log_file in logs_dir.glob("*.log"):
-            try:
-                with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                # Find domain names
-                domain_pattern = r'\b[a-z0-9.-]+\.(com|net|org|io|dev|ai|co)\b'
+        # Lowercase app names once; the earliest app in discovery order wins a context
+        app_names_lower = [(app_name.lower(), app_name) for app_name in self.app_endpoints.keys()]
+        app_names_key = tuple(app_name for _, app_name in app_names_lower)
+        log_files = list(logs_dir.glob("*.log"))
+        
+        cache = _open_log_cache()
+        try:
+            # Unchanged files scanned for the same apps come straight from the cache
+            stale = []
+            for log_file in log_files:
+                try:
+                    st = log_file.stat()
+                    stamp = (st.st_mtime_ns, st.st_size, app_names_key)
+                except OSError:
+                    stamp = None
                 
-                for match in re.finditer(domain_pattern, content, re.IGNORECASE):
-                    domain = match.group(0).lower()
-                    
-                    # Find associated app (look for app name in context)
-                    start = max(0, match.start() - 200)
-                    end = min(len(content), match.end() + 200)
-                    context = content[start:end]
-                    
-                    # Look for app names
-                    for app_name in self.app_endpoints.keys():
-                        if app_name.lower() in context.lower():
-                            self.app_endpoints[app_name]["domains"].add(domain)
-                            break
-            except Exception as e:
-                continue
+                cached = cache.get(str(log_file)) if cache is not None and stamp else None
+                if cached is not None and cached[0] == stamp:
+                    self._merge_log_domains(cached[1])
+                else:
+                    stale.append((log_file, stamp))
+            
+            # Search the remaining log files - independent, so scan them in parallel
+            stale_files = [log_file for log_file, _ in stale]
+            if len(stale_files) > 1:
+                with ProcessPoolExecutor(initializer=_init_log_worker, initargs=(app_names_lower,)) as executor:
+                    results = list(executor.map(_scan_log_file, stale_files, chunksize=4))
+            else:
+                _init_log_worker(app_names_lower)
+                results = [_scan_log_file(log_file) for log_file in stale_files]
+            
+            for (log_file, stamp), file_domains in zip(stale, results):
+                self._merge_log_domains(file_domains)
+                if cache is not None and stamp:
+                    cache[str(log_file)] = (stamp, file_domains)
+        finally:
+            if cache is not None:
+                cache.close()
         
         print(f"   Found domains for {sum(1 for e in self.app_endpoints.values() if e['domains'])} apps")
     
+    def _merge_log_domains(self, file_domains):
+        """Merge {app: domains} from one log file into app_endpoints"""
+        for app_name, domains in file_domains.items():
+            self.app_endpoints[app_name]["domains"].update(domains)
+    
     def convert_to_rules(self):
         """Convert discovered endpoints to LuLu rules"""
         rules = {}
@@ -169,8 +391,8 @@ class EndpointDiscovery:
             if not any([endpoints["urls"], endpoints["ips"], endpoints["domains"]]):
                 continue
             
-            # Extract domains from URLs
-            domains = set()
+            # Extract domains from URLs - (domain, port) pairs, all allowed as regex rules
+            domain_ports = set()
             for url in endpoints["urls"]:
                 match = re.match(r'https?://([^/:]+)', url)
                 if match:
@@ -178,26 +400,18 @@ class EndpointDiscovery:
                     port = '443' if url.startswith('https') else '80'
                     
                     # Convert to wildcard if subdomain
-                    if domain.count('.') > 1:
-                        parts = domain.split('.')
-                        domain = f"*.{'.'.join(parts[-2:])}"
-                    
-                    domains.add((domain, port, True))
+                    domain_ports.add((_wildcard(domain), port))
             
             # Add discovered domains
             for domain in endpoints["domains"]:
-                if domain.count('.') > 1:
-                    parts = domain.split('.')
-                    domain = f"*.{'.'.join(parts[-2:])}"
-                domains.add((domain, "443", True))
+                domain_ports.add((_wildcard(domain), "443"))
             
             # Create rule list
             endpoint_list = [
                 ("*", "*", False, "0")  # Default deny
             ]
             
-            for domain, port, is_regex in sorted(domains):
-                endpoint_list.append((domain, port, is_regex, "1"))
+            endpoint_list.extend((domain, port, True, "1") for domain, port in sorted(domain_ports))
             
             # Create config
             bundle_id = f"com.{app_name.lower().replace(' ', '.').replace('-', '.')}"
@@ -253,8 +467,12 @@ def main():
     
     # Save results
     output_file = "auto_discovered_rules.json"
-    with open(output_file, 'w') as f:
-        json.dump(rules, f, indent=2)
+    if HAS_ORJSON:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(rules, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(rules, f, indent=2)
     
     print()
     print(f"💾 Saved to: {output_file}")
@@ -5,214 +5,99 @@ Based on what apps you actually use
 """
 
 import json
-import uuid
+import sys
 from datetime import datetime
+from functools import lru_cache
+
+from lulu_rule_utils import make_rule, uuid_stream
+
+# Every rule carries these keys in this order; per-app and per-rule values are filled in
+RULE_TEMPLATE = {
+    "key": None,
+    "uuid": None,
+    "path": None,
+    "name": None,
+    "endpointAddr": "*",
+    "endpointPort": "*",
+    "creation": None,
+    "isEndpointAddrRegex": 0,
+    "type": 1,
+    "scope": 0,
+    "action": 0
+}
+
+# Allow rules: (key, name, path, [(endpointAddr, endpointPort, isEndpointAddrRegex), ...])
+APP_RULES_TABLE = [
+    # Safari - Web browsing
+    ("com.apple.Safari", "Safari", "/Applications/Safari.app/Contents/MacOS/Safari", [
+        ("*", "443", 0),
+        ("*", "80", 0)
+    ]),
+    # Windsurf - Code editor
+    ("com.exafunction.windsurf", "Windsurf", "/Applications/Windsurf.app/Contents/MacOS/Windsurf", [
+        ("api.codeium.com", "443", 0),
+        ("github.com", "443", 0),
+        ("*.githubusercontent.com", "443", 1)
+    ]),
+    # Slack - Communication
+    ("com.tinyspeck.slackmacgap", "Slack", "/Applications/Slack.app/Contents/MacOS/Slack", [
+        ("*.slack.com", "443", 1),
+        ("*.slack-edge.com", "443", 1)
+    ]),
+    # Mail - Email
+    ("com.apple.mail", "Mail", "/System/Applications/Mail.app/Contents/MacOS/Mail", [
+        ("*", "993", 0),
+        ("*", "587", 0),
+        ("*", "465", 0)
+    ])
+]
+
+# Block rules, all listed under BLOCK_Telemetry: (key, name, endpointAddr)
+BLOCK_RULES_TABLE = [
+    ("BLOCK_Telemetry", "Block Telemetry", "*.telemetry.*"),
+    ("BLOCK_Analytics", "Block Analytics", "*.analytics.*"),
+    ("BLOCK_Tracking", "Block Tracking", "*.tracking.*")
+]
+
+@lru_cache(maxsize=None)
+def _creation_timestamp():
+    """Rule creation time, formatted once per run and shared by every rule"""
+    now = datetime.now().astimezone()
+    return sys.intern(now.strftime("%Y-%m-%dT%H:%M:%S%z"))
 
 def create_app_rules():
     """Create port-specific rules for common apps"""
     
+    uuids = uuid_stream()
+    
     rules = {}
     
     # Get current timestamp
-    now = datetime.now().astimezone()
-    timestamp = now.strftime("%Y-%m-%dT%H:%M:%S%z")
+    timestamp = _creation_timestamp()
     
-    # Safari - Web browsing
-    rules["com.apple.Safari"] = [
-        {
-            "key": "com.apple.Safari",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Safari.app/Contents/MacOS/Safari",
-            "name": "Safari",
-            "endpointAddr": "*",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 0,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        },
-        {
-            "key": "com.apple.Safari",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Safari.app/Contents/MacOS/Safari",
-            "name": "Safari",
-            "endpointAddr": "*",
-            "endpointPort": "80",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 0,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        }
-    ]
-    
-    # Windsurf - Code editor
-    rules["com.exafunction.windsurf"] = [
-        {
-            "key": "com.exafunction.windsurf",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Windsurf.app/Contents/MacOS/Windsurf",
-            "name": "Windsurf",
-            "endpointAddr": "api.codeium.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 0,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        },
-        {
-            "key": "com.exafunction.windsurf",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Windsurf.app/Contents/MacOS/Windsurf",
-            "name": "Windsurf",
-            "endpointAddr": "github.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 0,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        },
-        {
-            "key": "com.exafunction.windsurf",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Windsurf.app/Contents/MacOS/Windsurf",
-            "name": "Windsurf",
-            "endpointAddr": "*.githubusercontent.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 1,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        }
-    ]
-    
-    # Slack - Communication
-    rules["com.tinyspeck.slackmacgap"] = [
-        {
-            "key": "com.tinyspeck.slackmacgap",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Slack.app/Contents/MacOS/Slack",
-            "name": "Slack",
-            "endpointAddr": "*.slack.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 1,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        },
-        {
-            "key": "com.tinyspeck.slackmacgap",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Slack.app/Contents/MacOS/Slack",
-            "name": "Slack",
-            "endpointAddr": "*.slack-edge.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 1,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        }
-    ]
-    
-    # Mail - Email
-    rules["com.apple.mail"] = [
-        {
-            "key": "com.apple.mail",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/System/Applications/Mail.app/Contents/MacOS/Mail",
-            "name": "Mail",
-            "endpointAddr": "*",
-            "endpointPort": "993",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 0,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        },
-        {
-            "key": "com.apple.mail",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/System/Applications/Mail.app/Contents/MacOS/Mail",
-            "name": "Mail",
-            "endpointAddr": "*",
-            "endpointPort": "587",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 0,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        },
-        {
-            "key": "com.apple.mail",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/System/Applications/Mail.app/Contents/MacOS/Mail",
-            "name": "Mail",
-            "endpointAddr": "*",
-            "endpointPort": "465",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 0,
-            "type": 1,
-            "scope": 0,
-            "action": 0
-        }
-    ]
+    for key, name, path, endpoints in APP_RULES_TABLE:
+        app = {**RULE_TEMPLATE, "key": key, "path": path, "name": name}
+        rules[key] = [
+            make_rule(app, next(uuids), timestamp,
+                       endpointAddr=addr, endpointPort=port, isEndpointAddrRegex=is_regex)
+            for addr, port, is_regex in endpoints
+        ]
     
     return rules
 
 def create_block_rules():
     """Create rules to BLOCK telemetry and analytics"""
     
+    uuids = uuid_stream()
+    
     rules = {}
-    now = datetime.now().astimezone()
-    timestamp = now.strftime("%Y-%m-%dT%H:%M:%S%z")
+    timestamp = _creation_timestamp()
     
     # Block all telemetry domains
+    block = {**RULE_TEMPLATE, "path": "*", "isEndpointAddrRegex": 1, "type": 3, "action": 1}
     rules["BLOCK_Telemetry"] = [
-        {
-            "key": "BLOCK_Telemetry",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "*",
-            "name": "Block Telemetry",
-            "endpointAddr": "*.telemetry.*",
-            "endpointPort": "*",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 1,
-            "type": 3,
-            "scope": 0,
-            "action": 1
-        },
-        {
-            "key": "BLOCK_Analytics",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "*",
-            "name": "Block Analytics",
-            "endpointAddr": "*.analytics.*",
-            "endpointPort": "*",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 1,
-            "type": 3,
-            "scope": 0,
-            "action": 1
-        },
-        {
-            "key": "BLOCK_Tracking",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "*",
-            "name": "Block Tracking",
-            "endpointAddr": "*.tracking.*",
-            "endpointPort": "*",
-            "creation": timestamp,
-            "isEndpointAddrRegex": 1,
-            "type": 3,
-            "scope": 0,
-            "action": 1
-        }
+        make_rule(block, next(uuids), timestamp, key=key, name=name, endpointAddr=addr)
+        for key, name, addr in BLOCK_RULES_TABLE
     ]
     
     return rules
@@ -231,8 +116,9 @@ def main():
     
     # Save
     output_file = "app_specific_port_rules.json"
+    # LuLu's ' : ' separator needs stdlib json; encode once and write in a single call
     with open(output_file, 'w') as f:
-        json.dump(all_rules, f, separators=(',', ' : '))
+        f.write(json.dumps(all_rules, separators=(',', ' : ')))
     
     print(f"✅ Created {sum(len(r) for r in all_rules.values())} rules")
     print(f"💾 Saved to: {output_file}")
@@ -5,205 +5,111 @@ Instead of wildcards (*:*), use actual destinations from network activity
 """
 
 import json
-import uuid
+import sys
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
-def create_port_specific_rules():
-    """
-    Generate LuLu rules with specific endpoints based on sysdiag analysis
-    """
-    
-    # Get current timestamp (match LuLu format exactly)
-    now = datetime.now().astimezone()
-    timestamp = now.strftime("%Y-%m-%dT%H:%M:%S%z")
-    # Add colon in timezone: -0700 -> -07:00
-    timestamp = timestamp[:-2] + ':' + timestamp[-2:] if len(timestamp) > 2 else timestamp
-    
-    rules = {}
-    
+from lulu_rule_utils import make_rule, uuid_stream
+
+# orjson (optional) encodes the rules file in C
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Every rule carries these keys in this order (LuLu string format); per-app and
+# per-rule values are filled in
+RULE_TEMPLATE = {
+    "key": None,
+    "uuid": None,
+    "path": None,
+    "name": None,
+    "endpointAddr": "*",
+    "endpointPort": "443",
+    "creation": None,
+    "isEndpointAddrRegex": "0",
+    "type": "1",
+    "scope": "0",
+    "action": "0"  # Allow
+}
+
+# (key, name, path, action, [(endpointAddr, endpointPort, isEndpointAddrRegex), ...])
+# Rows sharing a key are listed under that key in order; action "0" allows, "1" blocks
+PORT_RULES_TABLE = [
     # ============================================================
     # DEVELOPMENT TOOLS
     # ============================================================
     
     # Windsurf - AI Code Editor
-    rules["com.codeium.windsurf"] = [
-        # GitHub (from sysdiag: lb-140-82-116-4-sea.github.com)
-        {
-            "key": "com.codeium.windsurf",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Windsurf.app/Contents/MacOS/Windsurf",
-            "name": "Windsurf",
-            "endpointAddr": "*.github.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "1",  # Using regex for *.github.com (string format)
-            "type": "1",
-            "scope": "0",
-            "action": "0"  # Allow
-        },
-        {
-            "key": "com.codeium.windsurf",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Windsurf.app/Contents/MacOS/Windsurf",
-            "name": "Windsurf",
-            "endpointAddr": "*.githubusercontent.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "1",
-            "type": "1",
-            "scope": "0",
-            "action": "0"
-        },
-        {
-            "key": "com.codeium.windsurf",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Windsurf.app/Contents/MacOS/Windsurf",
-            "name": "Windsurf",
-            "endpointAddr": "api.codeium.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "0",
-            "type": "1",
-            "scope": "0",
-            "action": "0"
-        },
-        # Google Cloud (from sysdiag: *.bc.googleusercontent.com)
-        {
-            "key": "com.codeium.windsurf",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Windsurf.app/Contents/MacOS/Windsurf",
-            "name": "Windsurf",
-            "endpointAddr": "*.googleusercontent.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "1",
-            "type": "1",
-            "scope": "0",
-            "action": "0"
-        }
-    ]
+    ("com.codeium.windsurf", "Windsurf", "/Applications/Windsurf.app/Contents/MacOS/Windsurf", "0", [
+        ("*.github.com", "443", "1"),             # GitHub (from sysdiag: lb-140-82-116-4-sea.github.com)
+        ("*.githubusercontent.com", "443", "1"),
+        ("api.codeium.com", "443", "0"),
+        ("*.googleusercontent.com", "443", "1")   # Google Cloud (from sysdiag: *.bc.googleusercontent.com)
+    ]),
     
     # ============================================================
     # WEB BROWSERS
     # ============================================================
     
-    # Safari - Web Browser
-    rules["com.apple.Safari"] = [
-        # HTTPS
-        {
-            "key": "com.apple.Safari",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Safari.app/Contents/MacOS/Safari",
-            "name": "Safari",
-            "endpointAddr": "*",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "0",
-            "type": "1",
-            "scope": "0",
-            "action": "0"
-        },
-        # HTTP (for redirects)
-        {
-            "key": "com.apple.Safari",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/Applications/Safari.app/Contents/MacOS/Safari",
-            "name": "Safari",
-            "endpointAddr": "*",
-            "endpointPort": "80",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "0",
-            "type": "1",
-            "scope": "0",
-            "action": "0"
-        }
-    ]
+    # Safari - Web Browser: HTTPS, and HTTP for redirects
+    ("com.apple.Safari", "Safari", "/Applications/Safari.app/Contents/MacOS/Safari", "0", [
+        ("*", "443", "0"),
+        ("*", "80", "0")
+    ]),
     
     # ============================================================
     # APPLE SERVICES (Based on Sysdiag)
     # ============================================================
     
     # Apple CDN - For App Store, Updates (from sysdiag: *.aaplimg.com)
-    rules["com.apple.appstored"] = [
-        {
-            "key": "com.apple.appstored",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/System/Library/PrivateFrameworks/AppStoreDaemon.framework/Support/appstored",
-            "name": "appstored",
-            "endpointAddr": "*.aaplimg.com",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "1",
-            "type": "1",
-            "scope": "0",
-            "action": "0"
-        }
-    ]
+    ("com.apple.appstored", "appstored",
+     "/System/Library/PrivateFrameworks/AppStoreDaemon.framework/Support/appstored", "0", [
+        ("*.aaplimg.com", "443", "1")
+    ]),
     
     # ============================================================
     # BLOCK RULES (Based on Sysdiag Findings)
     # ============================================================
     
     # Block Cox ISP Tracking (from sysdiag: cdns1.cox.net, cdns6.cox.net)
-    rules["BLOCK_Cox_ISP"] = [
-        {
-            "key": "BLOCK_Cox_ISP",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "*",
-            "name": "Block Cox ISP Tracking",
-            "endpointAddr": "*.cox.net",
-            "endpointPort": "443",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "1",
-            "type": "1",
-            "scope": "0",
-            "action": "1"  # Block
-        }
-    ]
+    ("BLOCK_Cox_ISP", "Block Cox ISP Tracking", "*", "1", [
+        ("*.cox.net", "443", "1")
+    ]),
     
     # Block Apple Telemetry (from sysdiag: 17.248.x.x IPs)
-    rules["BLOCK_Apple_Telemetry"] = [
-        {
-            "key": "BLOCK_Apple_Telemetry",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/usr/libexec/adprivacyd",
-            "name": "adprivacyd",
-            "endpointAddr": "*",
-            "endpointPort": "*",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "0",
-            "type": "1",
-            "scope": "0",
-            "action": "1"  # Block
-        },
-        {
-            "key": "BLOCK_Apple_Telemetry",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/usr/libexec/analyticsd",
-            "name": "analyticsd",
-            "endpointAddr": "*",
-            "endpointPort": "*",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "0",
-            "type": "1",
-            "scope": "0",
-            "action": "1"  # Block
-        },
-        {
-            "key": "BLOCK_Apple_Telemetry",
-            "uuid": str(uuid.uuid4()).upper(),
-            "path": "/usr/libexec/diagnosticd",
-            "name": "diagnosticd",
-            "endpointAddr": "*",
-            "endpointPort": "*",
-            "creation": timestamp,
-            "isEndpointAddrRegex": "0",
-            "type": "1",
-            "scope": "0",
-            "action": "1"  # Block
-        }
-    ]
+    ("BLOCK_Apple_Telemetry", "adprivacyd", "/usr/libexec/adprivacyd", "1", [("*", "*", "0")]),
+    ("BLOCK_Apple_Telemetry", "analyticsd", "/usr/libexec/analyticsd", "1", [("*", "*", "0")]),
+    ("BLOCK_Apple_Telemetry", "diagnosticd", "/usr/libexec/diagnosticd", "1", [("*", "*", "0")])
+]
+
+@lru_cache(maxsize=None)
+def _creation_timestamp():
+    """Rule creation time in LuLu's format, formatted once per run and shared by every rule"""
+    # isoformat already writes the offset with a colon: -07:00
+    return sys.intern(datetime.now().astimezone().isoformat(timespec='seconds'))
+
+def create_port_specific_rules():
+    """
+    Generate LuLu rules with specific endpoints based on sysdiag analysis
+    """
+    
+    uuids = uuid_stream()
+    
+    # Get current timestamp (match LuLu format exactly)
+    timestamp = _creation_timestamp()
+    
+    rules = {}
+    
+    for key, name, path, action, endpoints in PORT_RULES_TABLE:
+        app = {**RULE_TEMPLATE, "key": key, "path": path, "name": name, "action": action}
+        rules.setdefault(key, []).extend(
+            make_rule(app, next(uuids), timestamp,
+                       endpointAddr=addr, endpointPort=port, isEndpointAddrRegex=is_regex)
+            for addr, port, is_regex in endpoints
+        )
     
     return rules
 
@@ -225,8 +131,12 @@ def main():
     
     # Save to file
     output_file = "port_specific_lulu_rules.json"
-    with open(output_file, 'w') as f:
-        json.dump(rules, f, indent=2)
+    if HAS_ORJSON:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(rules, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w') as f:
+            f.write(json.dumps(rules, indent=2))
     
     print(f"💾 Saved to: {output_file}")
     print()
@@ -6,44 +6,38 @@ Removes duplicate rules within each app
 
 import json
 import sys
-from collections import defaultdict
+
+# orjson (optional) encodes the rules file in C
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 def dedupe_app_rules(rules_list):
     """Deduplicate rules for a single app"""
-    # Group by endpoint address
-    by_endpoint = defaultdict(list)
+    addr_order = {}   # endpoint address -> first-seen position
+    wildcard = {}     # endpoint address -> its wildcard-port rule
+    specific = {}     # (endpoint address, port) -> first rule for it
     
     for rule in rules_list:
         addr = rule['endpointAddr']
-        by_endpoint[addr].append(rule)
-    
-    deduped = []
-    
-    for addr, rules in by_endpoint.items():
-        # Check for wildcard port
-        wildcard_port = None
-        specific_ports = []
+        addr_order.setdefault(addr, len(addr_order))
         
-        for rule in rules:
-            if rule['endpointPort'] == '*':
-                if not wildcard_port:
-                    wildcard_port = rule
-                elif rule['action'] == '0' and wildcard_port['action'] == '1':
-                    wildcard_port = rule  # Prefer BLOCK
-            else:
-                specific_ports.append(rule)
-        
-        # If wildcard port exists, only use that
-        if wildcard_port:
-            deduped.append(wildcard_port)
+        # Check for wildcard port
+        if rule['endpointPort'] == '*':
+            current = wildcard.get(addr)
+            if current is None or (rule['action'] == '0' and current['action'] == '1'):
+                wildcard[addr] = rule  # Prefer BLOCK
         else:
-            # Dedupe specific ports
-            seen_ports = set()
-            for rule in specific_ports:
-                port = rule['endpointPort']
-                if port not in seen_ports:
-                    deduped.append(rule)
-                    seen_ports.add(port)
+            specific.setdefault((addr, rule['endpointPort']), rule)
+    
+    # If wildcard port exists, only use that; otherwise one rule per specific port
+    deduped = [rule for (addr, port), rule in specific.items() if addr not in wildcard]
+    deduped.extend(wildcard.values())
+    
+    # Keep the rules for each address together, in first-seen order
+    deduped.sort(key=lambda rule: addr_order[rule['endpointAddr']])
     
     return deduped
 
@@ -51,8 +45,10 @@ def dedupe_json_file(input_file, output_file=None):
     """Deduplicate entire JSON rules file"""
     print(f"🔍 Loading: {input_file}")
     
-    with open(input_file) as f:
-        rules = json.load(f)
+    # One read into bytes, parsed without the text-mode decoder
+    with open(input_file, 'rb') as f:
+        data = f.read()
+    rules = orjson.loads(data) if HAS_ORJSON else json.loads(data)
     
     print(f"   Found {len(rules)} apps")
     print()
@@ -91,8 +87,12 @@ def dedupe_json_file(input_file, output_file=None):
         if output_file == input_file:
             output_file = input_file.replace('.json', '') + '-DEDUPED.json'
     
-    with open(output_file, 'w') as f:
-        json.dump(deduped_rules, f, indent=2)
+    if HAS_ORJSON:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(deduped_rules, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w') as f:
+            f.write(json.dumps(deduped_rules, indent=2))
     
     print(f"💾 Saved to: {output_file}")
     
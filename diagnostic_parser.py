@@ -4,16 +4,42 @@ Diagnostic File Parser for App-Based Firewall Generator
 Parses spindump and sysdiag files to extract process information
 """
 
+import mmap
+import os
 import re
+import sys
 import json
+from collections import defaultdict
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 
+# One pass over the whole spindump: each line that matters is a process header,
+# one of the header fields, or blank (the end of a process block)
+SPINDUMP_LINE_RE = re.compile(
+    rb'^[ \t\r\f\v]*(?:'
+    rb'Process:[ \t\r\f\v]+(?P<name>[^\n]+?)[ \t\r\f\v]+\[(?P<pid>\d+)\]'
+    rb'|Path:[ \t\r\f\v]+(?P<path>[^\n]*\S)'
+    rb'|Codesigning ID:[ \t\r\f\v]+(?P<codesigning_id>[^\n]*\S)'
+    rb'|UUID:[ \t\r\f\v]+(?P<uuid>[^\n]*\S)'
+    rb'|(?P<blank>)$'
+    rb')',
+    re.MULTILINE
+)
+
+NETWORK_INDICATORS = (
+    'network', 'dns', 'http', 'tcp', 'udp', 'wifi', 'bluetooth',
+    'cloud', 'sync', 'account', 'connect', 'rapport', 'sharing'
+)
+NETWORK_INDICATORS_RE = re.compile('|'.join(map(re.escape, NETWORK_INDICATORS)), re.IGNORECASE)
+SYSTEM_PATHS_RE = re.compile(r'/usr/|/system/|/library/', re.IGNORECASE)
+APP_PATH_RE = re.compile(r'/applications/([^/]+)\.app', re.IGNORECASE)
+
 class DiagnosticParser:
     def __init__(self):
         self.processes = {}
         self.network_processes = set()
-        self.app_processes = {}
+        self.app_processes = defaultdict(list)
         self.system_processes = set()
         
     def parse_spindump_file(self, file_path: str) -> Dict:
@@ -24,61 +50,55 @@ class DiagnosticParser:
         current_process = None
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
+            with open(file_path, 'rb') as f:
+                # mmap refuses empty files
+                if os.fstat(f.fileno()).st_size == 0:
+                    spindump = nullcontext(b'')
+                else:
+                    spindump = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                
+                with spindump as mm:
+                    line_num = 1
+                    line_pos = 0
                     
-                    # Match process headers: "Process: name [PID]"
-                    process_match = re.match(r'Process:\s+(.+?)\s+\[(\d+)\]', line)
-                    if process_match:
-                        process_name = process_match.group(1)
-                        process_pid = int(process_match.group(2))
+                    for match in SPINDUMP_LINE_RE.finditer(mm):
+                        line_num += mm[line_pos:match.start()].count(b'\n')
+                        line_pos = match.start()
+                        field = match.lastgroup
                         
-                        current_process = {
-                            'name': process_name,
-                            'pid': process_pid,
-                            'path': None,
-                            'codesigning_id': None,
-                            'uuid': None,
-                            'line_number': line_num
-                        }
-                        continue
-                    
-                    # Extract additional process information
-                    if current_process:
-                        # Path information
-                        path_match = re.match(r'Path:\s+(.+)', line)
-                        if path_match:
-                            current_process['path'] = path_match.group(1)
+                        # Match process headers: "Process: name [PID]"
+                        if field == 'pid':
+                            current_process = {
+                                'name': sys.intern(match.group('name').decode('utf-8', 'ignore')),
+                                'pid': int(match.group('pid')),
+                                'path': None,
+                                'codesigning_id': None,
+                                'uuid': None,
+                                'line_number': line_num
+                            }
+                            continue
                         
-                        # Codesigning ID
-                        codesign_match = re.match(r'Codesigning ID:\s+(.+)', line)
-                        if codesign_match:
-                            current_process['codesigning_id'] = codesign_match.group(1)
+                        if not current_process:
+                            continue
                         
-                        # UUID
-                        uuid_match = re.match(r'UUID:\s+(.+)', line)
-                        if uuid_match:
-                            current_process['uuid'] = uuid_match.group(1)
+                        # Handle empty lines - might indicate end of process block
+                        # (the empty match after a trailing newline is not a line)
+                        if field == 'blank':
+                            if match.start() == len(mm) or not current_process.get('name'):
+                                continue
                             
+                            # Store incomplete process if we have at least name and PID
+                            self._store_process(processes, current_process)
+                            current_process = None
+                            continue
+                        
+                        # Path, Codesigning ID or UUID
+                        current_process[field] = match.group(field).decode('utf-8', 'ignore')
+                        
+                        if field == 'uuid':
                             # Process is complete, store it
-                            if current_process.get('name') and current_process.get('pid'):
-                                process_key = f"{current_process['name']}_{current_process['pid']}"
-                                processes[process_key] = current_process.copy()
-                                
-                                # Categorize process
-                                self._categorize_process(current_process)
+                            self._store_process(processes, current_process)
                             current_process = None
-                    
-                    # Handle empty lines - might indicate end of process block
-                    if not line and current_process and current_process.get('name'):
-                        # Store incomplete process if we have at least name and PID
-                        if current_process.get('pid'):
-                            process_key = f"{current_process['name']}_{current_process['pid']}"
-                            processes[process_key] = current_process.copy()
-                            self._categorize_process(current_process)
-                        current_process = None
-                            
         except Exception as e:
             print(f"❌ Error parsing spindump file: {e}")
             return {}
@@ -87,39 +107,36 @@ class DiagnosticParser:
         print(f"✅ Parsed {len(processes)} processes from spindump")
         return processes
     
+    def _store_process(self, processes: Dict, process: Dict):
+        """Record a finished process block (needs a name and PID) and categorize it"""
+        if process.get('name') and process.get('pid'):
+            processes[f"{process['name']}_{process['pid']}"] = process
+            self._categorize_process(process)
+    
     def _categorize_process(self, process: Dict):
         """Categorize process as app, system, or network-related"""
-        name = process.get('name', '').lower() if process.get('name') else ''
-        path = process.get('path', '').lower() if process.get('path') else ''
+        name = process.get('name') or ''
+        path = process.get('path') or ''
         
-        # Identify application processes
-        if '/applications/' in path:
-            app_name = self._extract_app_name_from_path(path)
-            if app_name:
-                if app_name not in self.app_processes:
-                    self.app_processes[app_name] = []
-                self.app_processes[app_name].append(process)
+        # Identify application processes (keyed by lowercase app name)
+        app_name = self._extract_app_name_from_path(path)
+        if app_name:
+            self.app_processes[sys.intern(app_name.lower())].append(process)
         
         # Identify network-related processes
-        network_indicators = [
-            'network', 'dns', 'http', 'tcp', 'udp', 'wifi', 'bluetooth',
-            'cloud', 'sync', 'account', 'connect', 'rapport', 'sharing'
-        ]
-        
-        if any(indicator in name or indicator in path for indicator in network_indicators):
+        if NETWORK_INDICATORS_RE.search(name) or NETWORK_INDICATORS_RE.search(path):
             self.network_processes.add(process['name'])
         
         # Identify system processes
-        system_paths = ['/usr/', '/system/', '/library/']
-        if any(sys_path in path for sys_path in system_paths):
+        if SYSTEM_PATHS_RE.search(path):
             self.system_processes.add(process['name'])
     
     def _extract_app_name_from_path(self, path: str) -> str:
         """Extract app name from application path"""
         # Match pattern: /Applications/AppName.app/...
-        app_match = re.search(r'/applications/([^/]+)\.app', path, re.IGNORECASE)
+        app_match = APP_PATH_RE.search(path)
         if app_match:
-            return app_match.group(1)
+            return sys.intern(app_match.group(1))
         return None
     
     def get_processes_for_app(self, app_name: str) -> List[Dict]:
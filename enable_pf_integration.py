@@ -9,20 +9,40 @@ Architecture:
 - Both work together for defense in depth
 """
 
+import argparse
 import os
+import shutil
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Printed between the outputs of batched pfctl commands
+PFCTL_OUTPUT_SEPARATOR = "--- smart_firewall ---"
+
+# Read size used when scanning pf.conf for our anchor
+PF_CONF_CHUNK_SIZE = 64 * 1024
+
+def run_pfctl_batch(commands):
+    """Run several pfctl commands under a single sudo; return each command's stdout"""
+    script = f"; echo '{PFCTL_OUTPUT_SEPARATOR}'; ".join(commands)
+    result = subprocess.run(
+        ['sudo', 'sh', '-c', script],
+        capture_output=True,
+        text=True
+    )
+    outputs = result.stdout.split(PFCTL_OUTPUT_SEPARATOR + "\n")
+    return outputs + [''] * (len(commands) - len(outputs))
+
 def check_pf_status():
     """Check if packet filter is enabled"""
     result = subprocess.run(
         ['sudo', 'pfctl', '-s', 'info'],
-        capture_output=True,
-        text=True
+        capture_output=True
     )
     
-    if 'Status: Enabled' in result.stdout:
+    # Search the raw output; no need to decode it
+    if b'Status: Enabled' in result.stdout:
         print("✅ Packet filter is enabled")
         return True
     else:
@@ -43,15 +63,9 @@ def create_pf_anchor():
     
     anchor_file = Path("/etc/pf.anchors/smart_firewall")
     
-    # Write anchor file
+    # Write anchor file directly - main() already requires root
     try:
-        with open('/tmp/smart_firewall_anchor', 'w') as f:
-            f.write(anchor_conf)
-        
-        subprocess.run(
-            ['sudo', 'cp', '/tmp/smart_firewall_anchor', str(anchor_file)],
-            check=True
-        )
+        anchor_file.write_text(anchor_conf)
         
         print(f"✅ Created anchor file: {anchor_file}")
         
@@ -61,40 +75,77 @@ def create_pf_anchor():
     
     return True
 
+def _read_until(fd, needle, chunk_size=PF_CONF_CHUNK_SIZE):
+    """Read an open file in chunks, stopping at the first hit of needle
+    
+    Returns (found, bytes read so far) - the whole file when not found.
+    """
+    content = bytearray()
+    while True:
+        chunk = os.read(fd, chunk_size)
+        if not chunk:
+            return False, content
+        # Start the search far enough back to catch a match spanning chunks
+        start = max(0, len(content) - len(needle) + 1)
+        content += chunk
+        if content.find(needle, start) != -1:
+            return True, content
+
+def _write_file_atomic(path, data, mode):
+    """Write data next to path, then swap it in with os.replace"""
+    tmp_path = f"{path}.new"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
 def add_anchor_to_pf_conf():
     """Add our anchor to main pf.conf"""
     print("\n📝 Adding anchor to pf.conf...")
     
     pf_conf = Path("/etc/pf.conf")
+    backup = Path(str(pf_conf) + '.backup')
+    
+    try:
+        fd = os.open(pf_conf, os.O_RDONLY)
+    except OSError as e:
+        print(f"❌ Error modifying pf.conf: {e}")
+        return False
     
-    # Check if already added
     try:
-        with open(pf_conf) as f:
-            content = f.read()
-            if 'smart_firewall' in content:
-                print("✅ Anchor already in pf.conf")
-                return True
-    except:
-        pass
+        # Check if already added
+        found, content = _read_until(fd, b'smart_firewall')
+        mode = os.fstat(fd).st_mode & 0o7777
+    except Exception as e:
+        print(f"❌ Error modifying pf.conf: {e}")
+        return False
+    finally:
+        os.close(fd)
+    
+    if found:
+        print("✅ Anchor already in pf.conf")
+        return True
     
     # Add anchor line
-    anchor_line = "\nanchor \"smart_firewall\"\nload anchor \"smart_firewall\" from \"/etc/pf.anchors/smart_firewall\"\n"
+    anchor_line = b"\nanchor \"smart_firewall\"\nload anchor \"smart_firewall\" from \"/etc/pf.anchors/smart_firewall\"\n"
+    content += anchor_line
     
     try:
-        # Backup original
-        subprocess.run(
-            ['sudo', 'cp', str(pf_conf), str(pf_conf) + '.backup'],
-            check=True
-        )
+        # Backup original - pf.conf gets replaced by a new file below, so
+        # a hardlink keeps the old contents without copying them
+        backup.unlink(missing_ok=True)
+        try:
+            os.link(pf_conf, backup)
+        except OSError:
+            shutil.copyfile(pf_conf, backup)
         
-        # Append anchor
-        with open('/tmp/pf_conf_addition', 'w') as f:
-            f.write(anchor_line)
-        
-        subprocess.run(
-            ['sudo', 'sh', '-c', f'cat /tmp/pf_conf_addition >> {pf_conf}'],
-            check=True
-        )
+        # Write the new pf.conf beside the old one and swap it in atomically
+        _write_file_atomic(pf_conf, content, mode)
         
         print("✅ Added anchor to pf.conf")
         return True
@@ -125,8 +176,12 @@ def test_pf_rule():
     test_rule = "pass out proto tcp from any to pypi.org port 443"
     
     try:
+        # Load and flush the test rule under a single sudo; exit 2 means
+        # the rule loaded but flushing it failed
         result = subprocess.run(
-            ['sudo', 'pfctl', '-a', 'smart_firewall', '-f', '-'],
+            ['sudo', 'sh', '-c',
+             'pfctl -a smart_firewall -f - || exit 1; '
+             'pfctl -a smart_firewall -F all || exit 2'],
             input=test_rule.encode(),
             capture_output=True
         )
@@ -134,14 +189,13 @@ def test_pf_rule():
         if result.returncode == 0:
             print("✅ Test rule added successfully")
             print(f"   Rule: {test_rule}")
-            
-            # Remove test rule
-            subprocess.run(
-                ['sudo', 'pfctl', '-a', 'smart_firewall', '-F', 'all'],
-                check=True
-            )
             print("✅ Test rule removed")
             return True
+        elif result.returncode == 2:
+            print("✅ Test rule added successfully")
+            print(f"   Rule: {test_rule}")
+            print(f"❌ Error testing rule: could not remove test rule: {result.stderr.decode()}")
+            return False
         else:
             print(f"❌ Error adding test rule: {result.stderr.decode()}")
             return False
@@ -155,28 +209,29 @@ def show_status():
     print("\n📊 Current Status:")
     print("-" * 60)
     
+    # PF info and our anchor rules in one sudo round-trip
+    info, rules = run_pfctl_batch([
+        'pfctl -s info',
+        'pfctl -a smart_firewall -s rules'
+    ])
+    
     # Show PF info
-    result = subprocess.run(
-        ['sudo', 'pfctl', '-s', 'info'],
-        capture_output=True,
-        text=True
-    )
-    print(result.stdout)
+    print(info)
     
     # Show our anchor rules
     print("\n📋 Smart Firewall Anchor Rules:")
-    result = subprocess.run(
-        ['sudo', 'pfctl', '-a', 'smart_firewall', '-s', 'rules'],
-        capture_output=True,
-        text=True
-    )
     
-    if result.stdout.strip():
-        print(result.stdout)
+    if rules.strip():
+        print(rules)
     else:
         print("  (No active rules)")
 
 def main():
+    parser = argparse.ArgumentParser(description="Enable pf integration for Smart Adaptive Firewall")
+    parser.add_argument('-y', '--yes', action='store_true',
+                        help="don't wait for confirmation before making changes")
+    args = parser.parse_args()
+    
     print("\n🛡️  SMART ADAPTIVE FIREWALL - PF INTEGRATION SETUP")
     print("=" * 60)
     print()
@@ -191,15 +246,23 @@ def main():
         print("   sudo python3 enable_pf_integration.py")
         sys.exit(1)
     
-    input("Press Enter to continue or Ctrl+C to cancel...")
+    if args.yes:
+        print("➡️  --yes given, continuing without confirmation")
+    elif not sys.stdin.isatty():
+        print("➡️  stdin is not a terminal, continuing without confirmation")
+    else:
+        input("Press Enter to continue or Ctrl+C to cancel...")
+    
+    # Check PF status and create the anchor side by side - they are independent
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        status_future = executor.submit(check_pf_status)
+        anchor_future = executor.submit(create_pf_anchor)
     
-    # Check PF status
-    if not check_pf_status():
+    if not status_future.result():
         print("\n⚠️  Packet filter is not enabled.")
         print("This is normal on macOS - it will be enabled when we add rules.")
     
-    # Create anchor
-    if not create_pf_anchor():
+    if not anchor_future.result():
         print("\n❌ Setup failed at anchor creation")
         sys.exit(1)
     
@@ -4,32 +4,348 @@ Enhanced App-Based Firewall Generator GUI v2
 Added offline/online mode and app filtering
 """
 
+import os
+import re
 import sys
 import json
+import subprocess
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
-    QPushButton, QLabel, QTextEdit, QFileDialog, QMessageBox, 
+    QPushButton, QLabel, QPlainTextEdit, QFileDialog, QMessageBox, 
     QGroupBox, QCheckBox, QScrollArea, QProgressBar, QTabWidget,
-    QTableWidget, QTableWidgetItem, QHeaderView, QSplitter,
-    QDialog, QDialogButtonBox, QLineEdit, QRadioButton, QButtonGroup
+    QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QSplitter,
+    QDialog, QDialogButtonBox, QLineEdit, QRadioButton, QButtonGroup, QListView
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt6.QtGui import QFont, QStandardItemModel, QStandardItem
 
 from diagnostic_parser import DiagnosticParser
 from app_analyzer import AppAnalyzer
 from rule_generator import MurusRuleGenerator
 
+# psutil (optional) lists processes without spawning `ps`
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+# orjson (optional) encodes JSON in C
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# JSON previews larger than this are loaded into the text pane in chunks
+LARGE_JSON_SIZE = 1_000_000
+JSON_CHUNK_SIZE = 64 * 1024
+
+# Table cells are selectable but not editable
+READONLY_ITEM_FLAGS = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+def _readonly_item(text):
+    """QTableWidgetItem with READONLY_ITEM_FLAGS"""
+    item = QTableWidgetItem(text)
+    item.setFlags(READONLY_ITEM_FLAGS)
+    return item
+
+@lru_cache(maxsize=None)
+def _title_font(point_size):
+    """Bold title font, built once per size (needs a QApplication)"""
+    font = QFont()
+    font.setPointSize(point_size)
+    font.setBold(True)
+    return font
+
+@lru_cache(maxsize=None)
+def _mono_font(point_size):
+    """Courier font for text panes, built once per size (needs a QApplication)"""
+    return QFont("Courier", point_size)
+
+@lru_cache(maxsize=512)
+def _common_endpoints(app_name):
+    """Endpoint templates for an app, looked up once per name"""
+    from generate_all_app_rules import get_common_endpoints_for_app
+    return tuple(get_common_endpoints_for_app(app_name))
+
+def _capture_processes_with_psutil():
+    """Snapshot running processes in-process via psutil"""
+    live_processes = {}
+    for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline']):
+        info = proc.info
+        # Full path as both name and path, like argv[0] in the `ps aux` parser below;
+        # cmdline is None for other users' processes, but exe usually isn't
+        cmdline = info['cmdline']
+        process_name = info['exe'] or (cmdline[0] if cmdline else None) or info['name'] or 'Unknown'
+        live_processes[f"{process_name}_{info['pid']}"] = {
+            'name': process_name,
+            'pid': info['pid'],
+            'path': process_name,
+            'codesigning_id': None,
+            'uuid': None
+        }
+    return live_processes, len(live_processes)
+
+def _capture_processes_with_ps():
+    """Snapshot running processes by streaming `ps aux` (fallback without psutil)"""
+    live_processes = {}
+    process_count = 0
+    
+    try:
+        # Parse ps output line by line as it arrives
+        with subprocess.Popen(['ps', 'aux'], stdout=subprocess.PIPE, text=True) as ps_proc:
+            next(ps_proc.stdout, None)  # Skip the column header
+            
+            for line in ps_proc.stdout:
+                # maxsplit leaves the command as one field - only its first word is used
+                parts = line.split(None, 10)
+                if len(parts) == 11:
+                    pid = parts[1]
+                    process_name = parts[10].split(None, 1)[0]
+                    
+                    # Create process entry
+                    process_key = f"{process_name}_{pid}"
+                    live_processes[process_key] = {
+                        'name': process_name,
+                        'pid': int(pid) if pid.isdigit() else 0,
+                        'path': process_name,
+                        'codesigning_id': None,
+                        'uuid': None
+                    }
+                    process_count += 1
+            
+            ps_proc.wait(timeout=10)
+    except Exception as e:
+        print(f"⚠️ Error capturing processes: {e}")
+    
+    return live_processes, process_count
+
+def _dumps_indented(obj):
+    """Serialize obj as 2-space indented UTF-8 JSON bytes"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2).encode()
+
+def _dumps_compact(obj):
+    """Serialize obj as whitespace-free UTF-8 JSON bytes"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+def _write_json(path, obj, pretty=True):
+    """Write obj to path as JSON (indented unless pretty=False) in a single write"""
+    Path(path).write_bytes(_dumps_indented(obj) if pretty else _dumps_compact(obj))
+
+def _append_in_chunks(text_edit, payload, chunk_size=JSON_CHUNK_SIZE):
+    """Append UTF-8 text to a QPlainTextEdit a block of whole lines at a time"""
+    view = memoryview(payload)
+    start = 0
+    while True:
+        if len(payload) - start <= chunk_size:
+            end = len(payload)
+        else:
+            # appendPlainText starts a new line itself, so split on newlines
+            end = payload.rfind(b'\n', start, start + chunk_size)
+            if end == -1:
+                end = payload.find(b'\n', start + chunk_size)
+                if end == -1:
+                    end = len(payload)
+        text_edit.appendPlainText(view[start:end].tobytes().decode())
+        if end == len(payload):
+            break
+        start = end + 1
+
+# Typing pause (ms) before the app list filter is re-applied
+APP_FILTER_DELAY_MS = 150
+
+# Blocked process names in text-based rule files, in various formats
+BLOCKED_PROCESS_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:block|deny|reject)\s+([a-zA-Z0-9_.-]+)',
+    r'"name"\s*:\s*"([^"]+)".*"action"\s*:\s*"(?:block|deny)"',
+    r'"action"\s*:\s*"(?:block|deny)".*"name"\s*:\s*"([^"]+)"'
+))
+
+# Processes known to exfiltrate data or phone home, based on our research
+PREDEFINED_THREATS = frozenset({
+    # Apple Data Exfiltration Network
+    'cloudd', 'cloudphotod', 'accountsd', 'amsaccountsd', 'itunescloudd',
+    'bird', 'rtcreportingd', 'analyticsd', 'appleaccountd',
+    
+    # Telemetry & Analytics
+    'ecosystemanalyticsd', 'audioanalyticsd', 'inputanalyticsd', 
+    'wifianalyticsd', 'osanalyticshelper', 'adprivacyd',
+    
+    # Cloud Services
+    'CloudDocsStorageManagement', 'CloudStorageHelper', 'CloudTelemetryService',
+    'ProtectedCloudKeySyncing', 'iCloudNotificationAgent', 'icloudmailagent',
+    'com.apple.CloudPhotosConfiguration', 'com.apple.iCloudHelper',
+    
+    # Sync Services
+    'SafariBookmarksSyncAgent', 'mapssyncd', 'syncdefaultsd', 'biomesyncd',
+    'audioclocksyncd', 'colorsync.useragent', 'colorsyncd',
+    
+    # Network & Communication
+    'rapportd', 'sharingd', 'bluetoothd', 'airportd', 'nehelper',
+    'networkserviceproxy', 'mDNSResponderHelper', 'wifip2pd', 'wifivelocityd',
+    
+    # System Extensions & Helpers
+    'xpcroleaccountd', 'IOUserBluetoothSerialDriver', 'com.apple.ColorSyncXPCAgent',
+    'PerfPowerTelemetryClientRegistrationService',
+    
+    # News & Content
+    'newsd', 'NewsToday2', 'tipsd', 'privatecloudcomputed',
+    
+    # Location & Search
+    'locationd', 'searchpartyuseragent',
+    
+    # System Diagnostics
+    'SubmitDiagInfo', 'trustd'  # trustd can be malicious in some contexts
+})
+
+# Display strings for the rules table, shared by every row
+ACTION_TEXT = {'allow': "✅ ALLOW"}
+ENABLED_TEXT = {True: "✅ Yes", False: "❌ No"}
+
+# Shared read-only default for rules without a process dict
+_EMPTY = {}
+
+class RulesTableModel(QAbstractTableModel):
+    """Read-only rules table that formats each row only when it is shown"""
+    HEADERS = ["ID", "Action", "Process", "Description", "Enabled"]
+    
+    def __init__(self, rules, parent=None):
+        super().__init__(parent)
+        self.rules = rules
+        self._rows = [None] * len(rules)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rules)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        
+        row = index.row()
+        cells = self._rows[row]
+        if cells is None:
+            cells = self._rows[row] = self._format_rule(self.rules[row])
+        return cells[index.column()]
+    
+    def _format_rule(self, rule):
+        """Build the display strings for one rule"""
+        get = rule.get
+        action_text = ACTION_TEXT.get(get('action', 'unknown'), "❌ BLOCK")
+        process_name = (get('process') or _EMPTY).get('name', 'Unknown')
+        description = get('description', '')
+        enabled = ENABLED_TEXT[bool(get('enabled', False))]
+        return (str(get('id', '')), action_text, process_name, description, enabled)
+
+class LiveParser:
+    """Parser-compatible view of a live process capture"""
+    
+    # App name from a lowercased /Applications bundle path
+    APP_PATH_RE = re.compile(r'/applications/([^/]+)\.app', re.IGNORECASE)
+    # Substring markers of network and system processes, as single alternations
+    NETWORK_RE = re.compile(r'network|wifi|cloud|sync')
+    SYSTEM_PATH_RE = re.compile(r'/usr/|/system/|/library/')
+    
+    def __init__(self, processes):
+        self.processes = processes
+        self.network_processes = set()
+        self.system_processes = set()
+        self.app_processes = {}
+        
+        # Categorize processes
+        for proc_key, proc_info in processes.items():
+            name = proc_info.get('name', '').lower()
+            path = proc_info.get('path', '').lower()
+            
+            # Network processes
+            if self.NETWORK_RE.search(name) or self.NETWORK_RE.search(path):
+                self.network_processes.add(proc_info['name'])
+            
+            # System processes  
+            if self.SYSTEM_PATH_RE.search(path):
+                self.system_processes.add(proc_info['name'])
+            
+            # App processes
+            if '/applications/' in path:
+                app_name = self._extract_app_name(path)
+                if app_name:
+                    if app_name not in self.app_processes:
+                        self.app_processes[app_name] = []
+                    self.app_processes[app_name].append(proc_info)
+    
+    def _extract_app_name(self, path):
+        match = self.APP_PATH_RE.search(path)
+        return match.group(1) if match else None
+    
+    def get_network_processes(self):
+        return self.network_processes
+    
+    def get_system_processes(self):
+        return self.system_processes
+
+class AppDiscoveryThread(QThread):
+    """Background thread for installed-app discovery"""
+    apps_discovered = pyqtSignal(object)
+    discovery_failed = pyqtSignal(str)
+    
+    def __init__(self, analyzer):
+        super().__init__()
+        self.analyzer = analyzer
+    
+    def run(self):
+        try:
+            self.apps_discovered.emit(self.analyzer.discover_installed_apps())
+        except Exception as e:
+            self.discovery_failed.emit(str(e))
+
+class SysdiagLoadThread(QThread):
+    """Background thread that parses a sysdiag folder's ps.txt"""
+    sysdiag_loaded = pyqtSignal(object, object)
+    load_failed = pyqtSignal(str)
+    
+    def __init__(self, folder_path, ps_path):
+        super().__init__()
+        self.folder_path = folder_path
+        self.ps_path = ps_path
+    
+    def run(self):
+        try:
+            from generate_all_app_rules import parse_ps_file
+            processes = parse_ps_file(self.ps_path)
+            
+            # Deduplicate by app name, keeping the first process seen
+            unique_apps = {}
+            for proc in processes:
+                unique_apps.setdefault(proc['name'], proc)
+            
+            self.sysdiag_loaded.emit(processes, unique_apps)
+        except Exception as e:
+            self.load_failed.emit(str(e))
+
 class RulePreviewDialog(QDialog):
     """Large dialog for previewing rules"""
-    def __init__(self, ruleset, rule_generator, parent=None):
+    def __init__(self, ruleset, rule_generator, parent=None, summary=None):
         super().__init__(parent)
         self.setWindowTitle("🛡️ Murus Rules Preview")
         self.setGeometry(100, 100, 1200, 800)  # Made bigger
         self.ruleset = ruleset
         self.rule_generator = rule_generator
+        self.summary = summary  # Precomputed summary text, if the caller has one
         
         self.setup_ui()
     
@@ -38,33 +354,20 @@ class RulePreviewDialog(QDialog):
         
         # Title
         title = QLabel("🛡️ Generated Murus Rules Preview")
-        title_font = QFont()
-        title_font.setPointSize(16)
-        title_font.setBold(True)
-        title.setFont(title_font)
+        title.setFont(_title_font(16))
         title.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(title)
         
         # Tab widget for different views
         tab_widget = QTabWidget()
         
-        # Summary tab with scroll area
+        # Summary tab - the text pane scrolls itself
         summary_widget = QWidget()
         summary_layout = QVBoxLayout(summary_widget)
         
-        summary_scroll = QScrollArea()
-        summary_scroll.setWidgetResizable(True)
-        summary_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        summary_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        
-        summary_text = QTextEdit()
-        summary_text.setFont(QFont("Courier", 10))
-        summary_text.setMinimumHeight(600)  # Ensure minimum height
-        summary = self.rule_generator.generate_rule_summary(self.ruleset)
-        summary_text.setPlainText(summary)
-        
-        summary_scroll.setWidget(summary_text)
-        summary_layout.addWidget(summary_scroll)
+        self.summary_text = QPlainTextEdit()
+        self.summary_text.setFont(_mono_font(10))
+        summary_layout.addWidget(self.summary_text)
         
         tab_widget.addTab(summary_widget, "📊 Summary")
         
@@ -72,60 +375,54 @@ class RulePreviewDialog(QDialog):
         table_widget = QWidget()
         table_layout = QVBoxLayout(table_widget)
         
-        rules_table = QTableWidget()
-        rules_table.setColumnCount(5)
-        rules_table.setHorizontalHeaderLabels(["ID", "Action", "Process", "Description", "Enabled"])
-        rules_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        
-        # Populate table
-        rules = self.ruleset['rules']
-        rules_table.setRowCount(len(rules))
-        
-        for row, rule in enumerate(rules):
-            rules_table.setItem(row, 0, QTableWidgetItem(str(rule.get('id', ''))))
-            
-            action = rule.get('action', 'unknown')
-            action_text = "✅ ALLOW" if action == 'allow' else "❌ BLOCK"
-            rules_table.setItem(row, 1, QTableWidgetItem(action_text))
-            
-            process_name = rule.get('process', {}).get('name', 'Unknown')
-            rules_table.setItem(row, 2, QTableWidgetItem(process_name))
-            
-            description = rule.get('description', '')
-            rules_table.setItem(row, 3, QTableWidgetItem(description))
-            
-            enabled = "✅ Yes" if rule.get('enabled', False) else "❌ No"
-            rules_table.setItem(row, 4, QTableWidgetItem(enabled))
-        
-        table_layout.addWidget(rules_table)
+        self.rules_table = QTableView()
+        table_layout.addWidget(self.rules_table)
         tab_widget.addTab(table_widget, "📋 Rules Table")
         
-        # JSON tab with scroll area
+        # JSON tab - the text pane scrolls itself
         json_widget = QWidget()
         json_layout = QVBoxLayout(json_widget)
         
-        json_scroll = QScrollArea()
-        json_scroll.setWidgetResizable(True)
-        json_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        json_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        
-        json_text = QTextEdit()
-        json_text.setFont(QFont("Courier", 9))
-        json_text.setMinimumHeight(600)
-        json_content = json.dumps(self.ruleset, indent=2)
-        json_text.setPlainText(json_content)
-        
-        json_scroll.setWidget(json_text)
-        json_layout.addWidget(json_scroll)
+        self.json_text = QPlainTextEdit()
+        self.json_text.setFont(_mono_font(9))
+        json_layout.addWidget(self.json_text)
         
         tab_widget.addTab(json_widget, "📄 JSON")
         
+        # Fill each tab the first time it is shown, starting with Summary
+        self._tab_populated = [False] * tab_widget.count()
+        tab_widget.currentChanged.connect(self._populate_tab)
+        self._populate_tab(tab_widget.currentIndex())
+        
         layout.addWidget(tab_widget)
         
         # Buttons
         button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok)
         button_box.accepted.connect(self.accept)
         layout.addWidget(button_box)
+    
+    def _populate_tab(self, index):
+        """Fill a preview tab with its content on first activation"""
+        if index < 0 or self._tab_populated[index]:
+            return
+        self._tab_populated[index] = True
+        
+        if index == 0:
+            if self.summary is None:
+                self.summary = self.rule_generator.generate_rule_summary(self.ruleset)
+            self.summary_text.setPlainText(self.summary)
+        elif index == 1:
+            # Cells are formatted lazily by the model as rows scroll into view
+            self.rules_table.setModel(RulesTableModel(self.ruleset['rules'], self.rules_table))
+            self.rules_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        elif index == 2:
+            payload = _dumps_indented(self.ruleset)
+            if len(payload) > LARGE_JSON_SIZE:
+                self.json_text.setUndoRedoEnabled(False)
+                _append_in_chunks(self.json_text, payload)
+                self.json_text.setUndoRedoEnabled(True)
+            else:
+                self.json_text.setPlainText(payload.decode())
 
 class EnhancedFirewallGUI(QMainWindow):
     def __init__(self):
@@ -137,8 +434,14 @@ class EnhancedFirewallGUI(QMainWindow):
         # Data
         self.detected_processes = {}
         self.installed_apps = {}
+        self._sorted_app_names = []  # Sorted installed app names, cached per discovery
+        self._app_names_lower = []   # Lowercased, same order
+        self._checked_apps = set()         # Names of checked app rows
+        self._visible_app_names = set()    # Names passing the current app filter
+        self._bulk_app_check = False       # Defer selection updates while checking many rows
         self.analyzer = AppAnalyzer()
         self.ruleset = None
+        self._summary_cache = None  # (ruleset, summary text) for the last summarized ruleset
         self.saved_configs = {}
         self.is_offline_mode = False  # New: offline/online mode
         self.known_malicious = set()  # New: learned malicious processes
@@ -163,10 +466,7 @@ class EnhancedFirewallGUI(QMainWindow):
         
         # Title
         title = QLabel("🛡️ App-Based Firewall Generator - Enhanced v2")
-        title_font = QFont()
-        title_font.setPointSize(18)
-        title_font.setBold(True)
-        title.setFont(title_font)
+        title.setFont(_title_font(18))
         title.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(title)
         
@@ -282,17 +582,31 @@ class EnhancedFirewallGUI(QMainWindow):
         
         self.app_filter = QLineEdit()
         self.app_filter.setPlaceholderText("Type to filter applications...")
-        self.app_filter.textChanged.connect(self.filter_apps)
+        # Re-filter only once typing pauses for APP_FILTER_DELAY_MS
+        self.app_filter_timer = QTimer(self)
+        self.app_filter_timer.setSingleShot(True)
+        self.app_filter_timer.setInterval(APP_FILTER_DELAY_MS)
+        self.app_filter_timer.timeout.connect(lambda: self.filter_apps(self.app_filter.text()))
+        self.app_filter.textChanged.connect(self.app_filter_timer.start)
         filter_layout.addWidget(self.app_filter)
         
         self.filter_widget = QWidget()
         self.filter_widget.setLayout(filter_layout)
         app_layout.addWidget(self.filter_widget)
         
-        # App checkboxes in scroll area (EXPANDED HEIGHT)
-        self.app_scroll = QScrollArea()
-        self.app_scroll.setMaximumHeight(270)  # Increased by 20px (was 250)
-        app_layout.addWidget(self.app_scroll)
+        # App list (EXPANDED HEIGHT) - one checkable row per app, filtered by a proxy
+        self.app_model = QStandardItemModel(self)
+        self.app_model.itemChanged.connect(self.on_app_item_changed)
+        
+        self.app_proxy = QSortFilterProxyModel(self)
+        self.app_proxy.setSourceModel(self.app_model)
+        self.app_proxy.setFilterRole(Qt.ItemDataRole.UserRole)
+        self.app_proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        
+        self.app_list = QListView()
+        self.app_list.setModel(self.app_proxy)
+        self.app_list.setMaximumHeight(270)  # Increased by 20px (was 250)
+        app_layout.addWidget(self.app_list)
         
         # Quick select buttons (only visible in manual mode)
         btn_layout = QHBoxLayout()
@@ -371,8 +685,8 @@ class EnhancedFirewallGUI(QMainWindow):
         preview_group = QGroupBox("📋 Live Preview")
         preview_layout = QVBoxLayout(preview_group)
         
-        self.live_preview = QTextEdit()
-        self.live_preview.setFont(QFont("Courier", 10))
+        self.live_preview = QPlainTextEdit()
+        self.live_preview.setFont(_mono_font(10))
         self.live_preview.setPlainText("Generate rules to see preview...")
         preview_layout.addWidget(self.live_preview)
         
@@ -388,10 +702,7 @@ class EnhancedFirewallGUI(QMainWindow):
         
         # Title
         title = QLabel("💾 Saved Rule Configurations")
-        title_font = QFont()
-        title_font.setPointSize(14)
-        title_font.setBold(True)
-        title.setFont(title_font)
+        title.setFont(_title_font(14))
         layout.addWidget(title)
         
         # Configurations table
@@ -429,10 +740,7 @@ class EnhancedFirewallGUI(QMainWindow):
         
         # Title and description
         title = QLabel("🔍 Sysdiag Automation - Port-Specific Rules")
-        title_font = QFont()
-        title_font.setPointSize(14)
-        title_font.setBold(True)
-        title.setFont(title_font)
+        title.setFont(_title_font(14))
         layout.addWidget(title)
         
         desc = QLabel(
@@ -447,7 +755,7 @@ class EnhancedFirewallGUI(QMainWindow):
         how_it_works = QGroupBox("📚 How Sysdiag Automation Works")
         how_layout = QVBoxLayout(how_it_works)
         
-        steps_text = QTextEdit()
+        steps_text = QPlainTextEdit()
         steps_text.setReadOnly(True)
         steps_text.setMaximumHeight(300)
         steps_text.setPlainText(
@@ -504,6 +812,10 @@ class EnhancedFirewallGUI(QMainWindow):
         
         layout.addLayout(button_layout)
         
+        # Compact output is smaller and faster to write; indent only on request
+        self.pretty_json_cb = QCheckBox("📐 Pretty-print generated JSON")
+        layout.addWidget(self.pretty_json_cb)
+        
         # Status
         self.sysdiag_status = QLabel("No sysdiag data loaded")
         self.sysdiag_status.setStyleSheet("padding: 10px; background-color: #333; border-radius: 5px;")
@@ -513,7 +825,7 @@ class EnhancedFirewallGUI(QMainWindow):
         results_group = QGroupBox("📊 Analysis Results")
         results_layout = QVBoxLayout(results_group)
         
-        self.sysdiag_results = QTextEdit()
+        self.sysdiag_results = QPlainTextEdit()
         self.sysdiag_results.setReadOnly(True)
         self.sysdiag_results.setPlainText("Load sysdiag data to see analysis results...")
         results_layout.addWidget(self.sysdiag_results)
@@ -529,10 +841,7 @@ class EnhancedFirewallGUI(QMainWindow):
         
         # Title
         title = QLabel("📊 Security Analysis Dashboard")
-        title_font = QFont()
-        title_font.setPointSize(14)
-        title_font.setBold(True)
-        title.setFont(title_font)
+        title.setFont(_title_font(14))
         layout.addWidget(title)
         
         # Analysis content
@@ -542,8 +851,8 @@ class EnhancedFirewallGUI(QMainWindow):
         process_group = QGroupBox("🔍 Process Analysis")
         process_layout = QVBoxLayout(process_group)
         
-        self.process_analysis = QTextEdit()
-        self.process_analysis.setFont(QFont("Courier", 10))
+        self.process_analysis = QPlainTextEdit()
+        self.process_analysis.setFont(_mono_font(10))
         self.process_analysis.setPlainText("Load diagnostics to see process analysis...")
         process_layout.addWidget(self.process_analysis)
         
@@ -553,8 +862,8 @@ class EnhancedFirewallGUI(QMainWindow):
         threat_group = QGroupBox("🚨 Threat Assessment")
         threat_layout = QVBoxLayout(threat_group)
         
-        self.threat_analysis = QTextEdit()
-        self.threat_analysis.setFont(QFont("Courier", 10))
+        self.threat_analysis = QPlainTextEdit()
+        self.threat_analysis.setFont(_mono_font(10))
         self.threat_analysis.setPlainText("Generate rules to see threat analysis...")
         threat_layout.addWidget(self.threat_analysis)
         
@@ -585,7 +894,7 @@ class EnhancedFirewallGUI(QMainWindow):
         
         # Show/hide manual selection controls
         self.filter_widget.setVisible(not is_auto)
-        self.app_scroll.setVisible(not is_auto)
+        self.app_list.setVisible(not is_auto)
         self.quick_select_widget.setVisible(not is_auto)
         
         # Update status
@@ -596,45 +905,88 @@ class EnhancedFirewallGUI(QMainWindow):
     
     # Core functionality methods
     def discover_apps(self):
-        """Discover installed applications"""
-        try:
-            self.installed_apps = self.analyzer.discover_installed_apps()
-            self.update_app_checkboxes()
-            self.status_label.setText(f"Found {len(self.installed_apps)} applications")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to discover apps: {e}")
+        """Discover installed applications in the background"""
+        self.progress.setVisible(True)
+        self.progress.setRange(0, 0)
+        self.status_label.setText("🔍 Discovering installed applications...")
+        
+        self.discovery_thread = AppDiscoveryThread(self.analyzer)
+        self.discovery_thread.apps_discovered.connect(self.on_apps_discovered)
+        self.discovery_thread.discovery_failed.connect(self.on_discovery_failed)
+        self.discovery_thread.start()
+    
+    def on_apps_discovered(self, apps):
+        """Build the app list once discovery finishes"""
+        self.progress.setVisible(False)
+        self.installed_apps = apps
+        self._sorted_app_names = sorted(apps)
+        self._app_names_lower = [name.lower() for name in self._sorted_app_names]
+        self.update_app_checkboxes()
+        self.status_label.setText(f"Found {len(self.installed_apps)} applications")
+    
+    def on_discovery_failed(self, error):
+        """Report a failed app discovery"""
+        self.progress.setVisible(False)
+        QMessageBox.critical(self, "Error", f"Failed to discover apps: {error}")
     
     def update_app_checkboxes(self):
-        """Update app selection checkboxes"""
-        widget = QWidget()
-        layout = QVBoxLayout(widget)
-        
-        self.app_checkboxes = []
-        for app_name in sorted(self.installed_apps.keys()):
-            checkbox = QCheckBox(f"📱 {app_name}")
-            checkbox.setObjectName(app_name)
-            checkbox.stateChanged.connect(self.on_selection_changed)
+        """Update app selection list"""
+        items = []
+        for app_name in self._sorted_app_names:
+            item = QStandardItem(f"📱 {app_name}")
+            item.setCheckable(True)
+            item.setEditable(False)
+            item.setData(app_name, Qt.ItemDataRole.UserRole)
             
             # Add tooltip with app info
             app_info = self.installed_apps[app_name]
             tooltip = f"Bundle ID: {app_info.get('bundle_id', 'Unknown')}\n"
             tooltip += f"Path: {app_info.get('path', 'Unknown')}"
-            checkbox.setToolTip(tooltip)
+            item.setToolTip(tooltip)
             
-            self.app_checkboxes.append(checkbox)
-            layout.addWidget(checkbox)
+            items.append(item)
         
-        self.app_scroll.setWidget(widget)
+        # Insert every row in one model update
+        self.app_model.clear()
+        if items:
+            self.app_model.appendColumn(items)
+        self._checked_apps = set()
+        self._update_visible_app_names()
+    
+    def _app_items(self):
+        """All app list items"""
+        model = self.app_model
+        return [model.item(row) for row in range(model.rowCount())]
+    
+    def _visible_app_items(self):
+        """App list items currently shown (passing the filter, list not hidden)"""
+        if not self.app_list.isVisible():
+            return []
+        proxy = self.app_proxy
+        return [self.app_model.itemFromIndex(proxy.mapToSource(proxy.index(row, 0)))
+                for row in range(proxy.rowCount())]
+    
+    def _update_visible_app_names(self):
+        """Re-read which app names pass the proxy filter"""
+        proxy = self.app_proxy
+        role = Qt.ItemDataRole.UserRole
+        self._visible_app_names = {proxy.index(row, 0).data(role) for row in range(proxy.rowCount())}
+    
+    def _set_app_check_state(self, items, state):
+        """Check or uncheck many app rows, refreshing the selection once"""
+        self._bulk_app_check = True
+        try:
+            for item in items:
+                item.setCheckState(state)
+        finally:
+            self._bulk_app_check = False
+        self.on_selection_changed()
     
     # NEW: App filtering functionality
     def filter_apps(self, filter_text):
         """Filter applications based on search text"""
-        filter_text = filter_text.lower()
-        
-        for checkbox in getattr(self, 'app_checkboxes', []):
-            app_name = checkbox.objectName().lower()
-            should_show = filter_text in app_name
-            checkbox.setVisible(should_show)
+        self.app_proxy.setFilterFixedString(filter_text)
+        self._update_visible_app_names()
     
     def load_diagnostics(self):
         """Load spindump file or sysdiag folder"""
@@ -702,63 +1054,71 @@ class EnhancedFirewallGUI(QMainWindow):
                 self.progress.setRange(0, 0)
                 self.status_label.setText("🔍 Analyzing sysdiag data...")
                 
-                # Import the sysdiag analyzer
-                import sys
-                from pathlib import Path
-                sys.path.insert(0, str(Path(__file__).parent))
-                from generate_all_app_rules import parse_ps_file, find_app_dependencies
+                # Make the sysdiag analyzer importable
+                script_dir = str(Path(__file__).parent)
+                if script_dir not in sys.path:
+                    sys.path.insert(0, script_dir)
                 
-                # Parse ps.txt
-                ps_path = Path(folder_path) / "ps.txt"
-                if not ps_path.exists():
+                # Parse ps.txt in the background
+                base = Path(folder_path)
+                ps_path = base / "ps.txt"
+                if not ps_path.is_file():
                     raise FileNotFoundError(f"ps.txt not found in {folder_path}")
                 
-                processes = parse_ps_file(ps_path)
-                
-                # Store sysdiag data
-                self.sysdiag_folder = folder_path
-                self.sysdiag_processes = processes
-                
-                # Deduplicate by app name
-                unique_apps = {}
-                for proc in processes:
-                    if proc['name'] not in unique_apps:
-                        unique_apps[proc['name']] = proc
-                
-                self.sysdiag_apps = unique_apps
-                
-                self.progress.setVisible(False)
-                
-                # Update status
-                app_count = len(unique_apps)
-                self.sysdiag_status.setText(f"✅ Loaded sysdiag: {app_count} applications found")
-                self.status_label.setText(f"Sysdiag loaded - {app_count} apps detected")
-                
-                # Enable generation button
-                self.generate_sysdiag_rules_btn.setEnabled(True)
-                
-                # Show results
-                results_text = f"📊 SYSDIAG ANALYSIS RESULTS\n"
-                results_text += f"=" * 60 + "\n\n"
-                results_text += f"Folder: {folder_path}\n"
-                results_text += f"Applications found: {app_count}\n\n"
-                results_text += f"Top 20 Applications:\n"
-                results_text += "-" * 60 + "\n"
-                
-                for i, (app_name, proc) in enumerate(sorted(unique_apps.items())[:20], 1):
-                    results_text += f"{i}. {app_name}\n"
-                    results_text += f"   Path: {proc['path']}\n\n"
-                
-                if len(unique_apps) > 20:
-                    results_text += f"... and {len(unique_apps) - 20} more applications\n\n"
-                
-                results_text += "\nClick 'Generate Port-Specific Rules' to create LuLu rules!"
-                
-                self.sysdiag_results.setPlainText(results_text)
+                self.load_sysdiag_btn.setEnabled(False)
+                self.sysdiag_thread = SysdiagLoadThread(folder_path, ps_path)
+                self.sysdiag_thread.sysdiag_loaded.connect(self.on_sysdiag_loaded)
+                self.sysdiag_thread.load_failed.connect(self.on_sysdiag_load_failed)
+                self.sysdiag_thread.start()
                 
             except Exception as e:
-                self.progress.setVisible(False)
-                QMessageBox.critical(self, "Error", f"Failed to load sysdiag: {e}\n\nMake sure you selected the extracted sysdiagnose folder.")
+                self.on_sysdiag_load_failed(str(e))
+    
+    def on_sysdiag_loaded(self, processes, unique_apps):
+        """Show a parsed sysdiag folder"""
+        folder_path = self.sysdiag_thread.folder_path
+        self.load_sysdiag_btn.setEnabled(True)
+        
+        # Store sysdiag data
+        self.sysdiag_folder = folder_path
+        self.sysdiag_processes = processes
+        self.sysdiag_apps = unique_apps
+        
+        self.progress.setVisible(False)
+        
+        # Update status
+        app_count = len(unique_apps)
+        self.sysdiag_status.setText(f"✅ Loaded sysdiag: {app_count} applications found")
+        self.status_label.setText(f"Sysdiag loaded - {app_count} apps detected")
+        
+        # Enable generation button
+        self.generate_sysdiag_rules_btn.setEnabled(True)
+        
+        # Show results
+        results = [
+            "📊 SYSDIAG ANALYSIS RESULTS\n",
+            "=" * 60 + "\n\n",
+            f"Folder: {folder_path}\n",
+            f"Applications found: {app_count}\n\n",
+            "Top 20 Applications:\n",
+            "-" * 60 + "\n"
+        ]
+        
+        for i, (app_name, proc) in enumerate(sorted(unique_apps.items())[:20], 1):
+            results.append(f"{i}. {app_name}\n   Path: {proc['path']}\n\n")
+        
+        if len(unique_apps) > 20:
+            results.append(f"... and {len(unique_apps) - 20} more applications\n\n")
+        
+        results.append("\nClick 'Generate Port-Specific Rules' to create LuLu rules!")
+        
+        self.sysdiag_results.setPlainText("".join(results))
+    
+    def on_sysdiag_load_failed(self, error):
+        """Report a failed sysdiag load"""
+        self.load_sysdiag_btn.setEnabled(True)
+        self.progress.setVisible(False)
+        QMessageBox.critical(self, "Error", f"Failed to load sysdiag: {error}\n\nMake sure you selected the extracted sysdiagnose folder.")
     
     def generate_sysdiag_rules(self):
         """Generate port-specific rules from sysdiag data"""
@@ -782,13 +1142,10 @@ class EnhancedFirewallGUI(QMainWindow):
                 self.progress.setVisible(False)
                 return
             
-            # Import the rule generator
-            from generate_all_app_rules import get_common_endpoints_for_app
-            
             # Generate rules for all apps
             rules_data = {}
             for app_name, proc in self.sysdiag_apps.items():
-                endpoints = get_common_endpoints_for_app(app_name)
+                endpoints = list(_common_endpoints(app_name))
                 bundle_id = f"com.{app_name.lower().replace(' ', '.')}"
                 
                 rules_data[app_name] = {
@@ -798,9 +1155,7 @@ class EnhancedFirewallGUI(QMainWindow):
                 }
             
             # Save to file
-            import json
-            with open(output_path, 'w') as f:
-                json.dump(rules_data, f, indent=2)
+            _write_json(output_path, rules_data, pretty=self.pretty_json_cb.isChecked())
             
             self.progress.setVisible(False)
             
@@ -840,124 +1195,17 @@ class EnhancedFirewallGUI(QMainWindow):
             self.progress.setRange(0, 0)
             self.status_label.setText("🔴 Capturing live system data...")
             
-            import subprocess
-            import tempfile
-            from datetime import datetime
-            
-            # Create temporary file for live data
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            temp_file = f"/tmp/live_capture_{timestamp}.txt"
-            
             # Capture current processes
             self.status_label.setText("📋 Capturing process list...")
-            with open(temp_file, 'w') as f:
-                f.write("LIVE SYSTEM CAPTURE\n")
-                f.write(f"Timestamp: {datetime.now()}\n")
-                f.write("=" * 50 + "\n\n")
-                
-                # Get process list
-                f.write("RUNNING PROCESSES:\n")
-                f.write("-" * 30 + "\n")
-                
-                try:
-                    ps_output = subprocess.run(['ps', 'aux'], capture_output=True, text=True, timeout=10)
-                    f.write(ps_output.stdout)
-                except Exception as e:
-                    f.write(f"Error capturing processes: {e}\n")
-                
-                f.write("\n\nNETWORK CONNECTIONS:\n")
-                f.write("-" * 30 + "\n")
-                
-                # Get network connections
-                try:
-                    lsof_output = subprocess.run(['lsof', '-i'], capture_output=True, text=True, timeout=10)
-                    f.write(lsof_output.stdout)
-                except Exception as e:
-                    f.write(f"Error capturing network: {e}\n")
-            
-            # Parse the captured data
-            self.status_label.setText("🔍 Analyzing captured data...")
-            
-            # Create a simple parser for the live data
-            live_processes = {}
-            process_count = 0
-            
-            with open(temp_file, 'r') as f:
-                content = f.read()
-                
-                # Extract processes from ps output
-                lines = content.split('\n')
-                in_processes = False
-                
-                for line in lines:
-                    if 'RUNNING PROCESSES:' in line:
-                        in_processes = True
-                        continue
-                    elif 'NETWORK CONNECTIONS:' in line:
-                        in_processes = False
-                        continue
-                    
-                    if in_processes and line.strip() and not line.startswith('-'):
-                        parts = line.split()
-                        if len(parts) >= 11:
-                            pid = parts[1]
-                            command = ' '.join(parts[10:])
-                            process_name = parts[10] if len(parts) > 10 else 'Unknown'
-                            
-                            # Create process entry
-                            process_key = f"{process_name}_{pid}"
-                            live_processes[process_key] = {
-                                'name': process_name,
-                                'pid': int(pid) if pid.isdigit() else 0,
-                                'path': command.split()[0] if command else process_name,
-                                'codesigning_id': None,
-                                'uuid': None
-                            }
-                            process_count += 1
+            if HAS_PSUTIL:
+                live_processes, process_count = _capture_processes_with_psutil()
+            else:
+                live_processes, process_count = _capture_processes_with_ps()
             
             # Update the GUI with live data
             self.detected_processes = live_processes
             
-            # Create a mock parser object for compatibility
-            class LiveParser:
-                def __init__(self, processes):
-                    self.processes = processes
-                    self.network_processes = set()
-                    self.system_processes = set()
-                    self.app_processes = {}
-                    
-                    # Categorize processes
-                    for proc_key, proc_info in processes.items():
-                        name = proc_info.get('name', '').lower()
-                        path = proc_info.get('path', '').lower()
-                        
-                        # Network processes
-                        if any(net in name or net in path for net in ['network', 'wifi', 'cloud', 'sync']):
-                            self.network_processes.add(proc_info['name'])
-                        
-                        # System processes  
-                        if any(sys_path in path for sys_path in ['/usr/', '/system/', '/library/']):
-                            self.system_processes.add(proc_info['name'])
-                        
-                        # App processes
-                        if '/applications/' in path:
-                            app_name = self._extract_app_name(path)
-                            if app_name:
-                                if app_name not in self.app_processes:
-                                    self.app_processes[app_name] = []
-                                self.app_processes[app_name].append(proc_info)
-                
-                def _extract_app_name(self, path):
-                    import re
-                    match = re.search(r'/applications/([^/]+)\.app', path, re.IGNORECASE)
-                    return match.group(1) if match else None
-                
-                def get_network_processes(self):
-                    return self.network_processes
-                
-                def get_system_processes(self):
-                    return self.system_processes
-            
+            # Parser-compatible object for the analysis views
             self.parser = LiveParser(live_processes)
             
             self.progress.setVisible(False)
@@ -974,13 +1222,6 @@ class EnhancedFirewallGUI(QMainWindow):
             if self.get_selected_apps():
                 self.generate_btn.setEnabled(True)
             
-            # Clean up temp file
-            import os
-            try:
-                os.remove(temp_file)
-            except:
-                pass
-                
             QMessageBox.information(self, "Live Capture Complete", 
                                   f"🔴 LIVE CAPTURE SUCCESSFUL!\n\n" +
                                   f"📊 Captured {process_count} running processes\n" +
@@ -1148,21 +1389,28 @@ class EnhancedFirewallGUI(QMainWindow):
             
             for file_path in file_paths:
                 try:
-                    with open(file_path, 'r') as f:
-                        content = f.read()
+                    with open(file_path, 'rb') as f:
+                        data = f.read()
                     
-                    # Parse JSON rules
+                    # Parse JSON rules straight from the bytes
+                    parsed_as_json = False
                     if file_path.endswith('.json'):
                         try:
-                            rules_data = json.loads(content)
+                            rules_data = orjson.loads(data) if HAS_ORJSON else json.loads(data)
                             blocked = self._extract_blocked_from_json(rules_data)
                             total_blocked.update(blocked)
+                            parsed_as_json = True
                         except json.JSONDecodeError:
                             pass
                     
-                    # Parse text-based rules
-                    blocked = self._extract_blocked_from_text(content)
-                    total_blocked.update(blocked)
+                    # Parse text-based rules (newlines normalized as text mode would) -
+                    # only needed when the file wasn't valid JSON
+                    if not parsed_as_json:
+                        content = data.decode()
+                        if '\r' in content:
+                            content = content.replace('\r\n', '\n').replace('\r', '\n')
+                        blocked = self._extract_blocked_from_text(content)
+                        total_blocked.update(blocked)
                         
                 except Exception as e:
                     continue
@@ -1184,42 +1432,7 @@ class EnhancedFirewallGUI(QMainWindow):
             self.progress.setRange(0, 0)
             self.status_label.setText("📋 Loading threat intelligence...")
             
-            # Predefined malicious processes based on our research
-            predefined_threats = {
-                # Apple Data Exfiltration Network
-                'cloudd', 'cloudphotod', 'accountsd', 'amsaccountsd', 'itunescloudd',
-                'bird', 'rtcreportingd', 'analyticsd', 'appleaccountd',
-                
-                # Telemetry & Analytics
-                'ecosystemanalyticsd', 'audioanalyticsd', 'inputanalyticsd', 
-                'wifianalyticsd', 'osanalyticshelper', 'adprivacyd',
-                
-                # Cloud Services
-                'CloudDocsStorageManagement', 'CloudStorageHelper', 'CloudTelemetryService',
-                'ProtectedCloudKeySyncing', 'iCloudNotificationAgent', 'icloudmailagent',
-                'com.apple.CloudPhotosConfiguration', 'com.apple.iCloudHelper',
-                
-                # Sync Services
-                'SafariBookmarksSyncAgent', 'mapssyncd', 'syncdefaultsd', 'biomesyncd',
-                'audioclocksyncd', 'colorsync.useragent', 'colorsyncd',
-                
-                # Network & Communication
-                'rapportd', 'sharingd', 'bluetoothd', 'airportd', 'nehelper',
-                'networkserviceproxy', 'mDNSResponderHelper', 'wifip2pd', 'wifivelocityd',
-                
-                # System Extensions & Helpers
-                'xpcroleaccountd', 'IOUserBluetoothSerialDriver', 'com.apple.ColorSyncXPCAgent',
-                'PerfPowerTelemetryClientRegistrationService',
-                
-                # News & Content
-                'newsd', 'NewsToday2', 'tipsd', 'privatecloudcomputed',
-                
-                # Location & Search
-                'locationd', 'searchpartyuseragent',
-                
-                # System Diagnostics
-                'SubmitDiagInfo', 'trustd'  # trustd can be malicious in some contexts
-            }
+            predefined_threats = PREDEFINED_THREATS
             
             newly_found = predefined_threats - self.known_malicious
             self.known_malicious.update(predefined_threats)
@@ -1290,17 +1503,9 @@ class EnhancedFirewallGUI(QMainWindow):
     def _extract_blocked_from_text(self, content):
         """Extract blocked process names from text-based rule files"""
         blocked = set()
-        import re
         
-        # Look for blocked processes in various formats
-        patterns = [
-            r'(?:block|deny|reject)\s+([a-zA-Z0-9_.-]+)',
-            r'"name"\s*:\s*"([^"]+)".*"action"\s*:\s*"(?:block|deny)"',
-            r'"action"\s*:\s*"(?:block|deny)".*"name"\s*:\s*"([^"]+)"'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+        for pattern in BLOCKED_PROCESS_PATTERNS:
+            matches = pattern.findall(content)
             for match in matches:
                 if match and len(match) > 2:
                     blocked.add(match.strip())
@@ -1337,12 +1542,9 @@ class EnhancedFirewallGUI(QMainWindow):
     
     def _count_malicious_in_detected(self):
         """Count malicious processes in detected processes"""
-        count = 0
-        for process_info in self.detected_processes.values():
-            name = process_info.get('name', '')
-            if name in self.known_malicious:
-                count += 1
-        return count
+        known = self.known_malicious
+        return sum(1 for process_info in self.detected_processes.values()
+                   if process_info.get('name', '') in known)
     
     def launch_system_monitor(self):
         """Launch the real-time system monitor"""
@@ -1380,11 +1582,21 @@ class EnhancedFirewallGUI(QMainWindow):
     
     def get_selected_apps(self):
         """Get selected app names"""
-        selected = []
-        for checkbox in getattr(self, 'app_checkboxes', []):
-            if checkbox.isChecked() and checkbox.isVisible():  # Only count visible (filtered) apps
-                selected.append(checkbox.objectName())
-        return selected
+        if not self.app_list.isVisible():
+            return []
+        # Only count visible (filtered) apps, in list order
+        checked = self._checked_apps
+        visible = self._visible_app_names
+        return [name for name in self._sorted_app_names if name in checked and name in visible]
+    
+    def on_app_item_changed(self, item):
+        """Track a toggled app row, then refresh the selection"""
+        if item.checkState() == Qt.CheckState.Checked:
+            self._checked_apps.add(item.data(Qt.ItemDataRole.UserRole))
+        else:
+            self._checked_apps.discard(item.data(Qt.ItemDataRole.UserRole))
+        if not self._bulk_app_check:
+            self.on_selection_changed()
     
     def on_selection_changed(self):
         """Handle app selection changes"""
@@ -1398,28 +1610,25 @@ class EnhancedFirewallGUI(QMainWindow):
     
     def select_all(self):
         """Select all visible (filtered) apps"""
-        for checkbox in getattr(self, 'app_checkboxes', []):
-            if checkbox.isVisible():  # Only select visible apps
-                checkbox.setChecked(True)
+        self._set_app_check_state(self._visible_app_items(), Qt.CheckState.Checked)  # Only select visible apps
     
     def clear_all(self):
         """Clear all selections"""
-        for checkbox in getattr(self, 'app_checkboxes', []):
-            checkbox.setChecked(False)
+        checked = self._checked_apps
+        items = [item for item, name in zip(self._app_items(), self._sorted_app_names) if name in checked]
+        self._set_app_check_state(items, Qt.CheckState.Unchecked)
     
     def select_windsurf(self):
         """Select only Windsurf"""
         self.clear_all()
-        for checkbox in getattr(self, 'app_checkboxes', []):
-            if 'windsurf' in checkbox.objectName().lower():
-                checkbox.setChecked(True)
+        self._set_app_check_state([item for item, name_lower in zip(self._app_items(), self._app_names_lower)
+                                   if 'windsurf' in name_lower], Qt.CheckState.Checked)
     
     def select_safari(self):
         """Select only Safari"""
         self.clear_all()
-        for checkbox in getattr(self, 'app_checkboxes', []):
-            if 'safari' in checkbox.objectName().lower():
-                checkbox.setChecked(True)
+        self._set_app_check_state([item for item, name_lower in zip(self._app_items(), self._app_names_lower)
+                                   if 'safari' in name_lower], Qt.CheckState.Checked)
     
     def generate_rules(self):
         """Generate firewall rules with offline/online mode consideration"""
@@ -1483,7 +1692,7 @@ class EnhancedFirewallGUI(QMainWindow):
             self.save_config_btn.setEnabled(True)
             
             # Update live preview
-            summary = self.rule_generator.generate_rule_summary(self.ruleset)
+            summary = self._ruleset_summary()
             mode_header = f"🔒 OFFLINE MODE - AIR-GAPPED SECURITY\n" if self.is_offline_mode else f"🌐 ONLINE MODE - SELECTIVE ACCESS\n"
             self.live_preview.setPlainText(mode_header + "="*50 + "\n\n" + summary)
             
@@ -1509,13 +1718,23 @@ class EnhancedFirewallGUI(QMainWindow):
         
         return any(indicator in name or indicator in path for indicator in network_indicators)
     
+    def _ruleset_summary(self):
+        """Summary text for the current ruleset, generated once per ruleset"""
+        # Holding the ruleset itself (not its id) means a new ruleset can never hit a stale entry
+        cached = self._summary_cache
+        if cached is None or cached[0] is not self.ruleset:
+            summary = self.rule_generator.generate_rule_summary(self.ruleset)
+            cached = self._summary_cache = (self.ruleset, summary)
+        return cached[1]
+    
     def preview_rules(self):
         """Show large preview dialog"""
         if not self.ruleset:
             QMessageBox.warning(self, "No Rules", "Generate rules first")
             return
         
-        dialog = RulePreviewDialog(self.ruleset, self.rule_generator, self)
+        dialog = RulePreviewDialog(self.ruleset, self.rule_generator, self,
+                                   summary=self._ruleset_summary())
         dialog.exec()
     
     def export_rules(self):
@@ -1535,7 +1754,7 @@ class EnhancedFirewallGUI(QMainWindow):
             try:
                 self.rule_generator.export_to_murus_format(self.ruleset, file_path)
                 
-                summary = self.rule_generator.generate_rule_summary(self.ruleset)
+                summary = self._ruleset_summary()
                 mode_text = "OFFLINE (Air-gapped)" if self.is_offline_mode else "ONLINE (Selective)"
                 QMessageBox.information(self, "Export Complete", 
                                       f"Rules exported to:\n{file_path}\n\nMode: {mode_text}\n\n{summary}")
@@ -1617,10 +1836,9 @@ class EnhancedFirewallGUI(QMainWindow):
             
             # Load app selection
             self.clear_all()
-            selected_apps = config['selected_apps']
-            for checkbox in getattr(self, 'app_checkboxes', []):
-                if checkbox.objectName() in selected_apps:
-                    checkbox.setChecked(True)
+            selected_apps = set(config['selected_apps'])
+            self._set_app_check_state([item for item, name in zip(self._app_items(), self._sorted_app_names)
+                                       if name in selected_apps], Qt.CheckState.Checked)
             
             # Load ruleset
             self.ruleset = config['ruleset']
@@ -1636,25 +1854,36 @@ class EnhancedFirewallGUI(QMainWindow):
     
     def refresh_configurations(self):
         """Refresh configurations table"""
-        self.config_table.setRowCount(len(self.saved_configs))
-        
-        for row, (name, config) in enumerate(self.saved_configs.items()):
-            self.config_table.setItem(row, 0, QTableWidgetItem(name))
-            
-            mode_text = "🔒 OFFLINE" if config.get('mode') == 'offline' else "🌐 ONLINE"
-            self.config_table.setItem(row, 1, QTableWidgetItem(mode_text))
-            
-            apps_text = ', '.join(config['selected_apps'][:3])
-            if len(config['selected_apps']) > 3:
-                apps_text += "..."
-            self.config_table.setItem(row, 2, QTableWidgetItem(apps_text))
-            
-            self.config_table.setItem(row, 3, QTableWidgetItem(str(len(config['ruleset']['rules']))))
-            self.config_table.setItem(row, 4, QTableWidgetItem(config['created'][:19]))
+        # Fill the table without repainting or re-sorting after every cell
+        sorting_enabled = self.config_table.isSortingEnabled()
+        self.config_table.setSortingEnabled(False)
+        self.config_table.setUpdatesEnabled(False)
+        try:
+            self.config_table.setRowCount(len(self.saved_configs))
             
-            # Actions button
-            actions_btn = QPushButton("🔧 Actions")
-            self.config_table.setCellWidget(row, 5, actions_btn)
+            for row, (name, config) in enumerate(self.saved_configs.items()):
+                mode_text = "🔒 OFFLINE" if config.get('mode') == 'offline' else "🌐 ONLINE"
+                
+                apps_text = ', '.join(config['selected_apps'][:3])
+                if len(config['selected_apps']) > 3:
+                    apps_text += "..."
+                
+                row_items = (
+                    _readonly_item(name),
+                    _readonly_item(mode_text),
+                    _readonly_item(apps_text),
+                    _readonly_item(str(len(config['ruleset']['rules']))),
+                    _readonly_item(config['created'][:19])
+                )
+                for col, item in enumerate(row_items):
+                    self.config_table.setItem(row, col, item)
+                
+                # Actions button
+                actions_btn = QPushButton("🔧 Actions")
+                self.config_table.setCellWidget(row, 5, actions_btn)
+        finally:
+            self.config_table.setSortingEnabled(sorting_enabled)
+            self.config_table.setUpdatesEnabled(True)
     
     def delete_configuration(self):
         """Delete selected configuration"""
@@ -1682,8 +1911,7 @@ class EnhancedFirewallGUI(QMainWindow):
             )
             
             if file_path:
-                with open(file_path, 'w') as f:
-                    json.dump(config, f, indent=2)
+                _write_json(file_path, config)
                 mode_text = config.get('mode', 'online').upper()
                 QMessageBox.information(self, "Exported", f"Configuration exported to {file_path}\nMode: {mode_text}")
     
@@ -1785,7 +2013,7 @@ def main():
             background-color: #555; 
             color: #888; 
         }
-        QTextEdit, QScrollArea, QTableWidget { 
+        QPlainTextEdit, QScrollArea, QTableView, QListView { 
             background-color: #1e1e1e; 
             color: white; 
             border: 1px solid #555; 
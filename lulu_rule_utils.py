@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+LuLu Rule Helpers
+Shared by the scripts that build LuLu rule files from a rules table
+"""
+
+import os
+import uuid
+
+# Random bytes for rule UUIDs are read this many UUIDs at a time
+UUID_BATCH = 64
+
+def uuid_stream():
+    """Uppercase random (version 4) UUID strings, one os.urandom() call per UUID_BATCH"""
+    while True:
+        raw = os.urandom(16 * UUID_BATCH)
+        for i in range(0, len(raw), 16):
+            yield str(uuid.UUID(bytes=raw[i:i + 16], version=4)).upper()
+
+def make_rule(template, uuid_str, timestamp, **fields):
+    """Shallow-copy a rule template and fill in the per-rule values"""
+    rule = template.copy()
+    rule["uuid"] = uuid_str
+    rule["creation"] = timestamp
+    rule.update(fields)
+    return rule